@@ -2,20 +2,89 @@
 # Optimized for FAST shake detection
 # Interface similar to MPU6050 class
 
-from machine import I2C
+from machine import I2C, Pin
 from time import sleep_ms
+from array import array
+
+def _decode_into(raw, out, n):
+    """Store the signed x, y, z of a 6 byte little-endian sample at out[n:n+3]"""
+    for k in range(3):
+        v = raw[2 * k] | (raw[2 * k + 1] << 8)
+        if v & 0x8000:
+            v -= 0x10000
+        out[n + k] = v
 
 class ADXL345:
     ADDRESS = 0x53
     REG_DATA_FORMAT = 0x31
     REG_POWER_CTL = 0x2D
     REG_BW_RATE = 0x2C
+    REG_OFSX = 0x1E           # OFSX, OFSY, OFSZ: signed, 15.6 mg/LSB, added to every sample
     REG_DATAX0 = 0x32
+    REG_FIFO_CTL = 0x38
+    REG_FIFO_STATUS = 0x39
+    # Detection engines
+    REG_THRESH_TAP = 0x1D     # 62.5 mg/LSB
+    REG_DUR = 0x21            # 625 us/LSB, max tap duration
+    REG_LATENT = 0x22         # 1.25 ms/LSB, wait after a tap before the second
+    REG_WINDOW = 0x23         # 1.25 ms/LSB, time the second tap may start in
+    REG_THRESH_ACT = 0x24     # 62.5 mg/LSB
+    REG_THRESH_INACT = 0x25   # 62.5 mg/LSB
+    REG_TIME_INACT = 0x26     # 1 s/LSB
+    REG_ACT_INACT_CTL = 0x27
+    REG_THRESH_FF = 0x28      # 62.5 mg/LSB
+    REG_TIME_FF = 0x29        # 5 ms/LSB
+    REG_TAP_AXES = 0x2A
+    REG_INT_ENABLE = 0x2E
+    REG_INT_MAP = 0x2F        # Set bits go to INT2, clear bits to INT1
+    REG_INT_SOURCE = 0x30     # Reading clears the tap/activity/free-fall bits
+
+    # Interrupt bits, also used as event codes by pop_event()
+    INT_SINGLE_TAP = 0x40
+    INT_DOUBLE_TAP = 0x20
+    INT_ACTIVITY = 0x10
+    INT_INACTIVITY = 0x08
+    INT_FREE_FALL = 0x04
+    EVENTS = INT_SINGLE_TAP | INT_DOUBLE_TAP | INT_ACTIVITY | INT_INACTIVITY | INT_FREE_FALL
+
+    EVENT_QUEUE_SIZE = 16
+
+    SHAKE_THRESHOLD = 640  # ~2.5g total, raw units (256 = 1g)
+
+    # BW_RATE codes for the output data rates (Hz)
+    RATE_CODES = {12: 0x07, 25: 0x08, 50: 0x09, 100: 0x0A, 200: 0x0B, 400: 0x0C, 800: 0x0D, 1600: 0x0E, 3200: 0x0F}
+    LOW_POWER = 0x10  # BW_RATE bit: about a third of the current, a bit more noise (12-400 Hz)
+
+    # Power profiles: (data rate, low power mode)
+    PROFILE_ACTIVE = "active"   # Every detail of a shake or pat
+    PROFILE_IDLE = "idle"       # Lying still: just enough for the activity/inactivity engines
+    PROFILES = {PROFILE_ACTIVE: (400, False), PROFILE_IDLE: (25, True)}
+
+    OFS_SCALE = 4  # Raw units (3.9 mg) per offset register step (15.6 mg)
+
+    FIFO_DEPTH = 32
+    FIFO_BYPASS = 0x00
+    FIFO_STREAM = 0x80  # Keeps the newest 32 samples, oldest are dropped
 
     def __init__(self, i2c_bus, debug_mode=False):
         self.i2c = i2c_bus
         self.debug_mode = debug_mode
         self.available = False
+        self.fifo_enabled = False
+        self.rate_hz = 400
+        self.profile = self.PROFILE_ACTIVE
+        # FIFO buffers, allocated once so draining allocates nothing
+        self._fifo = array('h', bytes(2 * 3 * self.FIFO_DEPTH))
+        self._fifo_mv = memoryview(self._fifo)
+        self._entry = bytearray(6)
+        self._sample = array('h', (0, 0, 0))
+        self._status = bytearray(1)
+        # Detection events, a ring of INT_SOURCE snapshots filled by the IRQ
+        self._events = bytearray(self.EVENT_QUEUE_SIZE)
+        self._ev_head = 0
+        self._ev_tail = 0
+        self._int_source = bytearray(1)
+        self._int_pin = None
         
         # Try to initialize the real hardware
         try:
@@ -37,41 +106,218 @@ class ADXL345:
         """Replace all methods with safe dummy versions"""
         def dummy_read_accel_data():
             return (0, 0, 1000)
+
+        def dummy_read_accel_into(out):
+            out[0] = 0
+            out[1] = 0
+            out[2] = 1000
+            return out
         
         def dummy_read_accel_abs():
             return 1000.0
             
         def dummy_is_shaking():
             return False
+
+        def dummy_enable_fifo(watermark=16):
+            return False
+
+        def dummy_disable_fifo():
+            pass
+
+        def dummy_enable_events(int_pin=None, **kwargs):
+            return False
+
+        def dummy_pop_event():
+            return 0
+
+        def dummy_set_offsets(x, y, z):
+            pass
+
+        def dummy_set_data_rate(hz, low_power=False):
+            self.rate_hz = hz
+
+        def dummy_set_profile(name):
+            self.rate_hz = self.PROFILES[name][0]
+            self.profile = name
+
+        def dummy_event_pending():
+            return False
+
+        still = array('h', (0, 0, 1000))
+        def dummy_read_fifo():
+            return memoryview(still)
             
         # Replace instance methods
         self.read_accel_data = dummy_read_accel_data
+        self.read_accel_into = dummy_read_accel_into
         self.read_accel_abs = dummy_read_accel_abs
         self.is_shaking = dummy_is_shaking
+        self.enable_fifo = dummy_enable_fifo
+        self.disable_fifo = dummy_disable_fifo
+        self.enable_events = dummy_enable_events
+        self.pop_event = dummy_pop_event
+        self.set_offsets = dummy_set_offsets
+        self.set_data_rate = dummy_set_data_rate
+        self.set_profile = dummy_set_profile
+        self.event_pending = dummy_event_pending
+        self.read_fifo = dummy_read_fifo
 
     def _init_device(self):
         # Set device to measurement mode
         self.i2c.writeto_mem(self.ADDRESS, self.REG_POWER_CTL, b'\x08')
         # Set data format: ±8g range for better shake detection (0x0B = ±8g, full resolution)
         self.i2c.writeto_mem(self.ADDRESS, self.REG_DATA_FORMAT, b'\x0B')
-        # Set data rate to 800Hz for fast shake detection (0x0D = 800Hz) rather than full resolution
+        # Set data rate to 400Hz for fast shake detection (0x0C = 400Hz): the 32 sample FIFO
+        # then covers 80 ms, so a 50 ms poll never loses samples (at 800Hz it would)
         # Options: 0x0A=100Hz, 0x0B=200Hz, 0x0C=400Hz, 0x0D=800Hz, 0x0E=1600Hz, 0x0F=3200Hz
-        self.i2c.writeto_mem(self.ADDRESS, self.REG_BW_RATE, b'\x0D')
+        self.i2c.writeto_mem(self.ADDRESS, self.REG_BW_RATE, b'\x0C')
+        # Start with the FIFO bypassed so DATAX0.. always hold the newest sample
+        self.i2c.writeto_mem(self.ADDRESS, self.REG_FIFO_CTL, bytes((self.FIFO_BYPASS,)))
         sleep_ms(10)
 
-    def read_accel_data(self):
-        # Returns (x, y, z) in raw units (fast single I2C read)
+    def set_data_rate(self, hz, low_power=False):
+        """Set the output data rate to one of RATE_CODES (Hz)"""
+        code = self.RATE_CODES[hz]
+        if low_power:
+            code |= self.LOW_POWER
+        self.i2c.writeto_mem(self.ADDRESS, self.REG_BW_RATE, bytes((code,)))
+        self.rate_hz = hz
+
+    def set_profile(self, name):
+        """Switch to PROFILE_ACTIVE or PROFILE_IDLE (see PROFILES)"""
+        hz, low_power = self.PROFILES[name]
+        self.set_data_rate(hz, low_power)
+        self.profile = name
+
+    def set_offsets(self, x, y, z):
+        """Write the OFSX/OFSY/OFSZ trim (-128..127 steps of OFS_SCALE raw units)
+
+        The sensor adds them to every sample, FIFO included, and keeps them
+        until power is lost, so re-initialising the driver doesn't clear them.
+        """
+        self.i2c.writeto_mem(self.ADDRESS, self.REG_OFSX, bytes((x & 0xFF, y & 0xFF, z & 0xFF)))
+
+    def enable_fifo(self, watermark=16):
+        """Queue samples in the sensor's FIFO (stream mode) so read_fifo() gets all of them"""
+        # watermark (1-31) is the fill level that raises the WATERMARK interrupt
+        watermark = max(1, min(watermark, self.FIFO_DEPTH - 1))
+        self.i2c.writeto_mem(self.ADDRESS, self.REG_FIFO_CTL, bytes((self.FIFO_STREAM | watermark,)))
+        self.fifo_enabled = True
+        return True
+
+    def disable_fifo(self):
+        self.i2c.writeto_mem(self.ADDRESS, self.REG_FIFO_CTL, bytes((self.FIFO_BYPASS,)))
+        self.fifo_enabled = False
+
+    def read_fifo(self):
+        """Drain the FIFO. Returns x, y, z triples (signed raw units) oldest first
+
+        The result is a view of a buffer reused by the next call.
+        """
+        i2c = self.i2c
+        addr = self.ADDRESS
+        i2c.readfrom_mem_into(addr, self.REG_FIFO_STATUS, self._status)
+        count = self._status[0] & 0x3F
+        if count > self.FIFO_DEPTH:
+            count = self.FIFO_DEPTH
+        # Every 6 byte read of DATAX0..DATAZ1 pops one entry; reading further
+        # runs into FIFO_CTL, so each entry is its own transfer.
+        out = self._fifo
+        entry = self._entry
+        reg = self.REG_DATAX0
+        n = 0
+        for _ in range(count):
+            i2c.readfrom_mem_into(addr, reg, entry)
+            _decode_into(entry, out, n)
+            n += 3
+        return self._fifo_mv[:n]
+
+    def enable_events(self, int_pin=None, tap_g=3.0, act_g=0.25, inact_g=0.19, inact_s=5, ff_g=0.4, ff_ms=150):
+        """Turn on the tap, double tap, activity, inactivity and free-fall engines
+
+        int_pin is the GPIO wired to INT1; the events are then queued from its
+        IRQ. With int_pin=None, pop_event() polls INT_SOURCE instead.
+        """
+        w = self.i2c.writeto_mem
+        a = self.ADDRESS
+        w(a, self.REG_INT_ENABLE, b'\x00')  # Quiet while reconfiguring
+        w(a, self.REG_THRESH_TAP, bytes((min(255, int(tap_g / 0.0625)),)))
+        w(a, self.REG_DUR, bytes((24,)))     # Taps shorter than 15 ms
+        w(a, self.REG_LATENT, bytes((64,)))  # 80 ms of ringing ignored
+        w(a, self.REG_WINDOW, bytes((200,))) # Second tap within 250 ms
+        w(a, self.REG_TAP_AXES, b'\x07')
+        w(a, self.REG_THRESH_ACT, bytes((max(1, int(act_g / 0.0625)),)))
+        w(a, self.REG_THRESH_INACT, bytes((max(1, int(inact_g / 0.0625)),)))
+        w(a, self.REG_TIME_INACT, bytes((min(255, inact_s),)))
+        w(a, self.REG_ACT_INACT_CTL, b'\xFF')  # AC-coupled, all axes, so gravity doesn't count
+        w(a, self.REG_THRESH_FF, bytes((int(ff_g / 0.0625),)))
+        w(a, self.REG_TIME_FF, bytes((min(255, ff_ms // 5),)))
+        w(a, self.REG_INT_MAP, b'\x00')  # Everything on INT1
+        self.i2c.readfrom_mem_into(a, self.REG_INT_SOURCE, self._int_source)  # Drop stale flags
+        w(a, self.REG_INT_ENABLE, bytes((self.EVENTS,)))
+        if int_pin is not None:
+            # INT1 is active high and stays high until INT_SOURCE is read
+            self._int_pin = Pin(int_pin, Pin.IN)
+            self._int_pin.irq(handler=self._on_int, trigger=Pin.IRQ_RISING)
+        return True
+
+    def _on_int(self, pin):
+        # Soft IRQ on the ESP32, so the I2C read is allowed here
+        try:
+            self._poll_int_source()
+        except OSError:
+            pass
+
+    def _poll_int_source(self):
+        self.i2c.readfrom_mem_into(self.ADDRESS, self.REG_INT_SOURCE, self._int_source)
+        bits = self._int_source[0] & self.EVENTS
+        if bits:
+            nxt = (self._ev_head + 1) % self.EVENT_QUEUE_SIZE
+            if nxt != self._ev_tail:  # Full: drop the newest
+                self._events[self._ev_head] = bits
+                self._ev_head = nxt
+
+    def event_pending(self):
+        """True if an event is queued or INT1 is raised. Never touches the bus"""
+        if self._ev_tail != self._ev_head:
+            return True
+        pin = self._int_pin
+        return pin is not None and pin.value() == 1
+
+    def pop_event(self):
+        """Next queued event as INT_* bits (several may be set), 0 if none"""
+        if self._ev_tail == self._ev_head:
+            pin = self._int_pin
+            # Poll without a pin, or if an edge was missed and INT1 is still high
+            if pin is None or pin.value():
+                self._poll_int_source()
+            if self._ev_tail == self._ev_head:
+                return 0
+        bits = self._events[self._ev_tail]
+        self._ev_tail = (self._ev_tail + 1) % self.EVENT_QUEUE_SIZE
+        return bits
+
+    def read_accel_into(self, out):
+        # Fills out[0:3] (e.g. an array('h')) with signed x, y, z in raw units
+        # Allocation free: one I2C read into a buffer owned by the driver.
+        # With the FIFO enabled this pops the oldest queued sample.
         if not self.available:
             if self.debug_mode:
-                return (0, 0, 1000)  # Return fake "still" values
+                out[0] = 0
+                out[1] = 0
+                out[2] = 1000  # Fake "still" values
+                return out
             else:
                 raise OSError("ADXL345 not available")
-        
-        data = self.i2c.readfrom_mem(self.ADDRESS, self.REG_DATAX0, 6)
-        x = int.from_bytes(data[0:2], 'little', True)
-        y = int.from_bytes(data[2:4], 'little', True)
-        z = int.from_bytes(data[4:6], 'little', True)
-        return (x, y, z)
+        self.i2c.readfrom_mem_into(self.ADDRESS, self.REG_DATAX0, self._entry)
+        _decode_into(self._entry, out, 0)
+        return out
+
+    def read_accel_data(self):
+        # Returns (x, y, z) in raw units (fast single I2C read)
+        s = self.read_accel_into(self._sample)
+        return (s[0], s[1], s[2])
 
     def read_accel_abs(self):
         # Returns absolute acceleration - OPTIMIZED for shake detection
@@ -82,16 +328,16 @@ class ADXL345:
             else:
                 raise OSError("ADXL345 not available")
                 
-        x, y, z = self.read_accel_data()
-        abs_val = (x**2 + y**2 + z**2) ** 0.5
-        return abs_val
+        s = self.read_accel_into(self._sample)
+        return (s[0] * s[0] + s[1] * s[1] + s[2] * s[2]) ** 0.5
     
     def is_shaking(self):
         # Quick shake detection - returns True if shaking detected
-        # Fixed threshold=8000 works well for ±8g range
+        # Compares squared magnitudes, so no float or sqrt is needed
         if not self.available:
             return False  # No shaking if sensor unavailable
-        return self.read_accel_abs() > 8000
+        s = self.read_accel_into(self._sample)
+        return s[0] * s[0] + s[1] * s[1] + s[2] * s[2] > self.SHAKE_THRESHOLD * self.SHAKE_THRESHOLD
 
 """
 OPTIMIZATION SUMMARY for Shake Detection:
@@ -100,14 +346,17 @@ OPTIMIZATION SUMMARY for Shake Detection:
    i2c_bus = I2C(0, scl=Pin(0), sda=Pin(1), freq=400_000)
 
 2. ADXL345 Config:
-   - Data Rate: 800Hz (0x0D) - very fast sampling
-   - Range: ±8g (0x0B) - better for shake detection than ±2g
-   - Single I2C read gets all 3 axes (6 bytes)
-
-3. Recommended thresholds for raw values (±8g range):
-   - Light movement: < 2000
-   - Shake detection: > 8000
-   - Aggressive shaking: > 15000
+   - Data Rate: 400Hz (0x0C) - fast sampling the FIFO can hold between polls, dropped to 25Hz low power
+     while lying still (set_profile, switched on activity/inactivity)
+   - Range: ±8g (0x0B), full resolution - 256 raw units per g, signed
+   - Single I2C read gets all 3 axes (6 bytes), decoded in place
+     (read_accel_into) so polling doesn't allocate
+   - FIFO stream mode (enable_fifo/read_fifo) keeps every sample between reads
+
+3. Recommended thresholds for raw magnitudes (±8g range, 1g = 256 at rest):
+   - Light movement: < 400
+   - Shake detection: > 640 (SHAKE_THRESHOLD)
+   - Aggressive shaking: > 1200
 
 4. Loop timing: 50ms or faster for responsive shake detection
    
@@ -0,0 +1,162 @@
+# Keyframe timelines for the pet's face animations
+# Per-mood timing comes from the core's "animations" section (falling back to
+# DEFAULT_ANIMATIONS) and is compiled once into flat arrays, so sampling a
+# frame is integer indexing only. Each sample also reports the deadline at
+# which the output next changes, so callers can sleep instead of polling.
+
+from array import array
+from time import ticks_diff, ticks_add
+
+SWAY_STEPS = 36  # Sway curve samples per period
+
+# Fields of a track:
+#   frame_ms    - time each face of the sequence is shown
+#   frames      - max faces of the sequence used (0 = all of them)
+#   offsets     - x offset (px) for each frame, cycled
+#   sway        - sine sway amplitude (px), sway_ms its period
+#   duration_ms - how long the mood lasts (0 = until changed), timed from its start
+#   then        - mood shown once the duration is over
+#   blink       - whether the eyes may blink during the mood
+_TRACK_FIELDS = {
+    "frame_ms": 2600, "frames": 0, "offsets": [], "sway": 0, "sway_ms": 1800,
+    "duration_ms": 0, "then": None, "blink": True,
+}
+
+# Default timings (fallback if core json has no animations)
+DEFAULT_ANIMATIONS = {
+    "default": {"frame_ms": 2600, "sway": 7, "sway_ms": 1800},
+    "happy": {"frame_ms": 2000, "sway": 0},
+    "really_happy": {"frame_ms": 1700, "sway": 0},
+    "shake": {"frame_ms": 210, "frames": 3, "offsets": [-11, 0, 10], "sway": 0,
+              "duration_ms": 2000, "then": "happy", "blink": False},
+    "headpat": {"frame_ms": 400, "frames": 2, "offsets": [-3, 2], "sway": 0,
+                "duration_ms": 1200, "then": "happy", "blink": False},
+}
+
+def _merge_specs(animations, moods):
+    base = dict(_TRACK_FIELDS)
+    base.update(DEFAULT_ANIMATIONS["default"])
+    base.update(animations.get("default", {}))
+    specs = {}
+    for mood in moods:
+        spec = dict(base)
+        spec.update(DEFAULT_ANIMATIONS.get(mood, {}))
+        spec.update(animations.get(mood, {}))
+        specs[mood] = spec
+    specs["default"] = base
+    return specs
+
+class Timeline:
+    def __init__(self, faces, animations=None):
+        """Compile tracks for every mood in faces (mood -> list of face strings)"""
+        if not isinstance(animations, dict):
+            animations = {}
+        moods = [m for m in faces if isinstance(faces[m], list)]
+        for m in animations:
+            if m not in moods and m != "default":
+                moods.append(m)
+        specs = _merge_specs(animations, moods)
+        names = list(specs)
+        self._ids = {name: i for i, name in enumerate(names)}
+        self._names = names
+        self._default = self._ids["default"]
+        self._frame_ms = array('H')
+        self._frames = array('B')      # Frames actually cycled (already limited by the sequence)
+        self._duration = array('H')
+        self._then = array('b')
+        self._blink = bytearray(len(names))
+        self._off_start = array('H')
+        self._off_len = array('B')
+        self._offsets = array('b')
+        self._sway_start = array('h')  # -1 = no sway
+        self._sway_ms = array('H')
+        self._sway = array('b')
+        from math import sin, pi
+        for i, name in enumerate(names):
+            spec = specs[name]
+            seq = faces.get(name)
+            count = len(seq) if isinstance(seq, list) and seq else 1
+            frames = int(spec["frames"] or count)
+            self._frame_ms.append(max(1, min(int(spec["frame_ms"]), 65535)))
+            self._frames.append(max(1, min(frames, count, 255)))
+            self._duration.append(min(int(spec["duration_ms"]), 65535))
+            self._then.append(-1)
+            self._blink[i] = 1 if spec["blink"] else 0
+            offsets = spec["offsets"] or []
+            self._off_start.append(len(self._offsets))
+            self._off_len.append(len(offsets))
+            for o in offsets:
+                self._offsets.append(int(o))
+            amplitude = int(spec["sway"])
+            self._sway_ms.append(max(SWAY_STEPS, min(int(spec["sway_ms"]), 65535)))
+            if amplitude:
+                self._sway_start.append(len(self._sway))
+                for k in range(SWAY_STEPS):
+                    self._sway.append(int(amplitude * sin(2 * pi * k / SWAY_STEPS)))
+            else:
+                self._sway_start.append(-1)
+        # Resolve transitions once every track has an id
+        for i, name in enumerate(names):
+            then = specs[name]["then"]
+            if then is not None:
+                self._then[i] = self._ids.get(then, self._default)
+
+        self._requested = None
+        self._start = 0
+        # Outputs of the last sample()
+        self.mood = None
+        self.frame = 0
+        self.offset = 0
+        self.blink = True
+        self.deadline = 0
+
+    def sample(self, mood, now):
+        """Work out the frame for mood at now; returns the next deadline (ticks_ms)"""
+        if mood != self._requested:
+            self._requested = mood
+            self._start = now
+        track = self._ids.get(mood, self._default)
+        name = mood
+        elapsed = ticks_diff(now, self._start)
+        duration = self._duration[track]
+        relative = duration > 0
+        expired = relative and elapsed > duration
+        if expired:
+            # Over: show the follow-up for this frame, restart on the next request
+            self._requested = None
+            then = self._then[track]
+            if then >= 0:
+                track = then
+                name = self._names[then]
+                relative = False
+
+        t = elapsed if relative else now
+        frame_ms = self._frame_ms[track]
+        raw = t // frame_ms
+        frame = raw % self._frames[track]
+        wait = frame_ms - t % frame_ms
+
+        offset = 0
+        off_len = self._off_len[track]
+        if off_len:
+            offset = self._offsets[self._off_start[track] + frame % off_len]
+        sway_start = self._sway_start[track]
+        if sway_start >= 0:
+            period = self._sway_ms[track]
+            phase = now % period
+            step = phase * SWAY_STEPS // period
+            offset += self._sway[sway_start + step]
+            next_phase = ((step + 1) * period + SWAY_STEPS - 1) // SWAY_STEPS
+            if next_phase - phase < wait:
+                wait = next_phase - phase
+        if relative and duration - elapsed + 1 < wait:
+            wait = duration - elapsed + 1
+        if expired:
+            wait = 1
+
+        self.mood = name
+        self.frame = frame
+        self.offset = offset
+        self.blink = bool(self._blink[track])
+        self.deadline = ticks_add(now, max(1, wait))
+        return self.deadline
@@ -0,0 +1,47 @@
+# Small fixed-size queue for uasyncio tasks
+# MicroPython's uasyncio has no Queue. This one keeps its slots in a list
+# allocated up front and wakes a waiting get() through an Event. When full,
+# put_nowait() drops the new item rather than blocking the producer.
+
+import uasyncio as asyncio
+
+class Queue:
+    def __init__(self, size):
+        self._items = [None] * size
+        self._size = size
+        self._head = 0
+        self._count = 0
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def __len__(self):
+        return self._count
+
+    def empty(self):
+        return self._count == 0
+
+    def put_nowait(self, item):
+        """Queue item; returns False (and drops it) if the queue is full"""
+        if self._count == self._size:
+            self.dropped += 1
+            return False
+        self._items[(self._head + self._count) % self._size] = item
+        self._count += 1
+        self._ready.set()
+        return True
+
+    def get_nowait(self):
+        """Oldest item, or None if the queue is empty"""
+        if not self._count:
+            return None
+        item = self._items[self._head]
+        self._items[self._head] = None
+        self._head = (self._head + 1) % self._size
+        self._count -= 1
+        return item
+
+    async def get(self):
+        while not self._count:
+            self._ready.clear()
+            await self._ready.wait()
+        return self.get_nowait()
@@ -0,0 +1,16 @@
+# Operation counters shared by the host fakes
+# The fakes bump these as the device code draws and talks to the bus;
+# render_bench.py resets them around each scenario.
+
+stats = {}
+
+FIELDS = ("px_ops", "fill_rect", "blit", "text", "fb_new", "shows", "cmd_bytes", "data_bytes")
+
+def reset():
+    for k in FIELDS:
+        stats[k] = 0
+
+def add(key, n=1):
+    stats[key] += n
+
+reset()
@@ -0,0 +1,153 @@
+# Host stand-in for MicroPython's framebuf
+# Pixel-exact for the formats the firmware uses (MONO_VLSB, MONO_HLSB) and
+# counts the work the C implementation would do: px_ops is the number of
+# pixels written by pixel/hline/vline/rect/fill_rect/line/text/blit. fill()
+# is a memset on the device and is not counted as pixel work.
+# The built-in font is replaced by a fixed synthetic 8x8 font, so text
+# pixel counts are comparable between runs, not with the device font.
+
+import counters
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+
+def _glyph(c):
+    if c == 32:
+        return (0,) * 8
+    # Columns 0 and 7 stay empty like the real font's spacing
+    return (0,) + tuple(((c * (k + 3) * 37) >> 1) & 0x3E for k in range(6)) + (0,)
+
+_FONT = {c: _glyph(c) for c in range(32, 128)}
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        counters.add("fb_new")
+        self.buf = buffer
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = width if stride is None else stride
+
+    # --- Raw access, not counted ---
+    def _get(self, x, y):
+        if self.format == MONO_VLSB:
+            return (self.buf[(y >> 3) * self.stride + x] >> (y & 7)) & 1
+        i = (y * self.stride + x) >> 3
+        if self.format == MONO_HLSB:
+            return (self.buf[i] >> (7 - (x & 7))) & 1
+        return (self.buf[i] >> (x & 7)) & 1
+
+    def _set(self, x, y, c):
+        if self.format == MONO_VLSB:
+            i = (y >> 3) * self.stride + x
+            bit = 1 << (y & 7)
+        else:
+            i = (y * self.stride + x) >> 3
+            bit = 1 << (7 - (x & 7) if self.format == MONO_HLSB else x & 7)
+        if c:
+            self.buf[i] |= bit
+        else:
+            self.buf[i] &= ~bit & 0xFF
+
+    def _fill_area(self, x, y, w, h, c):
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.height)
+        if x1 <= x0 or y1 <= y0:
+            return
+        counters.add("px_ops", (x1 - x0) * (y1 - y0))
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                self._set(xx, yy, c)
+
+    # --- Drawing API ---
+    def fill(self, c):
+        v = 0xFF if c else 0
+        n = len(self.buf)
+        self.buf[0:n] = bytes([v]) * n
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        counters.add("px_ops")
+        self._set(x, y, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        counters.add("fill_rect")
+        self._fill_area(x, y, w, h, c)
+
+    def hline(self, x, y, w, c):
+        self._fill_area(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self._fill_area(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self._fill_area(x, y, w, 1, c)
+        self._fill_area(x, y + h - 1, w, 1, c)
+        self._fill_area(x, y, 1, h, c)
+        self._fill_area(x + w - 1, y, 1, h, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x0, y0, c)
+            if x0 == x1 and y0 == y1:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def text(self, s, x, y, c=1):
+        counters.add("text")
+        for ch in str(s):
+            code = ord(ch)
+            if code < 32 or code > 127:
+                code = 127
+            cols = _FONT[code]
+            for cx in range(8):
+                px = x + cx
+                if px < 0 or px >= self.width:
+                    continue
+                col = cols[cx]
+                for cy in range(8):
+                    py = y + cy
+                    if col >> cy & 1 and 0 <= py < self.height:
+                        counters.add("px_ops")
+                        self._set(px, py, c)
+            x += 8
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        counters.add("blit")
+        for sy in range(fbuf.height):
+            py = y + sy
+            if py < 0 or py >= self.height:
+                continue
+            for sx in range(fbuf.width):
+                px = x + sx
+                if px < 0 or px >= self.width:
+                    continue
+                col = fbuf._get(sx, sy)
+                if palette is not None:
+                    col = palette._get(col, 0)
+                if col != key:
+                    counters.add("px_ops")
+                    self._set(px, py, col)
+
+    def scroll(self, xstep, ystep):
+        pass
@@ -0,0 +1,99 @@
+# Host stand-ins for the machine peripherals the firmware touches
+# Buttons read as released, I2C devices read as zeros and every byte written
+# to the bus is counted.
+
+import counters
+
+class Pin:
+    IN = 1
+    OUT = 3
+    PULL_UP = 2
+    PULL_DOWN = 1
+    IRQ_FALLING = 2
+    IRQ_RISING = 1
+
+    def __init__(self, pin_id, mode=-1, pull=-1, value=None):
+        self.id = pin_id
+        self._value = 1 if value is None else value
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = v
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+    def irq(self, handler=None, trigger=0):
+        self.handler = handler
+
+class I2C:
+    def __init__(self, bus_id=0, scl=None, sda=None, freq=400_000):
+        self.freq = freq
+
+    def scan(self):
+        return [0x3C, 0x53]
+
+    def writeto(self, addr, buf, stop=True):
+        # SSD1306 commands are sent as (0x80, cmd) pairs
+        counters.add("cmd_bytes", len(buf))
+        return 1
+
+    def writevto(self, addr, vector, stop=True):
+        # SSD1306 data is sent as [b"\x40", buffer]
+        counters.add("data_bytes", sum(len(b) for b in vector))
+        return 1
+
+    def writeto_mem(self, addr, reg, buf):
+        counters.add("cmd_bytes", len(buf) + 1)
+
+    def readfrom_mem(self, addr, reg, nbytes):
+        return bytes(nbytes)
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        for i in range(len(buf)):
+            buf[i] = 0
+
+class PWM:
+    def __init__(self, pin, freq=0, duty_u16=0):
+        self._freq = freq
+        self._duty = duty_u16
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self._duty
+        self._duty = d
+
+    def deinit(self):
+        pass
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, timer_id=-1, **kwargs):
+        self.callback = None
+
+    def init(self, mode=PERIODIC, period=-1, freq=-1, callback=None):
+        # Nothing fires on the host; callers flush explicitly
+        self.callback = callback
+
+    def deinit(self):
+        self.callback = None
+
+def freq(f=None):
+    return 160_000_000
+
+def unique_id():
+    return b"\xde\xad\xbe\xef\x00\x01"
+
+def reset():
+    raise SystemExit("machine.reset()")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+render_bench – host-side render and I2C benchmark
+
+Runs the firmware's drawing code under CPython with the stand-ins in
+bench/fakes (machine, framebuf, ssd1306, ...) and prints, per scenario,
+how much drawing work and bus traffic it costs:
+
+  shows      display refreshes
+  px_ops     pixels written by drawing primitives (fill() not counted)
+  fill_rect  / blit / text   primitive calls
+  fb_new     FrameBuffer objects created
+  i2c_B      bytes sent to the SSD1306 (commands + data)
+  B/show     i2c_B per refresh
+  heap_B     peak Python heap growth during the scenario (tracemalloc)
+
+Scenarios: every mood through oled_functions.update_oled, the settings
+menu (menu._render_menu), the first boot screen and one frame of each
+bundled game. Time is virtual, so runs are deterministic.
+
+Usage:
+    python bench/render_bench.py [--frames N] [--software-flip] [--only NAME] [--json FILE]
+"""
+
+import argparse, json, os, random, shutil, sys, tempfile, time, tracemalloc
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(REPO / "bench" / "fakes"), str(REPO), str(REPO / "custom_code")]
+
+import counters  # noqa: E402  (bench/fakes)
+
+# ------------------------------  VIRTUAL CLOCK  ------------------------------
+
+_now = [0]
+
+def _ticks_ms():
+    return _now[0]
+
+def _sleep_ms(ms):
+    _now[0] += int(ms)
+
+time.ticks_ms = _ticks_ms
+time.ticks_us = lambda: _now[0] * 1000
+time.ticks_diff = lambda a, b: a - b
+time.ticks_add = lambda a, b: a + b
+time.sleep_ms = _sleep_ms
+time.sleep_us = lambda us: None
+
+LOOP_MS = 50  # main.py's loop period
+
+GAMES = ["SnakeGame", "FlappyGame", "DinoGame", "Breakout"]
+
+class FrameLimit(Exception):
+    """Raised by the bench display to leave loops that never return on their own"""
+
+# ------------------------------  SCENARIOS  ------------------------------
+
+def _make_display(limit=None):
+    import display
+    from machine import I2C
+
+    class BenchDisplay(display.Display):
+        frame_limit = limit
+
+        def show(self, src=None):
+            super().show(src)
+            counters.add("shows")
+            if self.frame_limit is not None and counters.stats["shows"] >= self.frame_limit:
+                raise FrameLimit()
+
+    return BenchDisplay(128, 64, I2C(0))
+
+_moods_drawn = set()     # Moods update_oled actually drew (it falls back to "curious" for unknown ones)
+
+def mood_scenario(mood):
+    def run(oled, upside_down, frames):
+        import oled_functions
+        oled_functions.invalidate_frame()
+        for _ in range(frames):
+            oled_functions.update_oled(oled, mood, None, upside_down)
+            _moods_drawn.add(oled_functions._last_request[0])
+            _sleep_ms(LOOP_MS)
+        return frames
+    return run
+
+def menu_scenario(oled, upside_down, frames):
+    import menu
+    items = [
+        {"name": "Mute", "key": "mute", "type": "toggle"},
+        {"name": "Core: Default", "key": "core", "type": "action"},
+        {"name": "See IDs", "key": "sidekick_id", "type": "action"},
+        {"name": "Run Custom Apps", "key": "exec", "type": "action"},
+        {"name": "Wipe Extra Apps", "key": "wipe_custom", "type": "action"},
+        {"name": "Start Web Server", "key": "start_web_server", "type": "action"},
+        {"name": "Reset Settings", "key": "reset", "type": "action"},
+        {"name": "Go Back", "key": "exit", "type": "action"},
+    ]
+    # Scroll through the list like a user holding the down button
+    for i in range(frames):
+        menu._render_menu(oled, items, i % len(items), False, upside_down)
+    return frames
+
+def first_boot_scenario(oled, upside_down, frames):
+    import first_boot
+    oled.frame_limit = frames
+    try:
+        first_boot.run_first_boot(oled, upside_down)
+    except FrameLimit:
+        pass
+    return frames
+
+def game_scenario(name):
+    module = __import__("custom_code_" + name)
+
+    def run(oled, upside_down, frames):
+        from canvas import Canvas
+        random.seed(1)
+        module.init_game()
+        if hasattr(module, "reset_ball_and_paddle"):
+            module.reset_ball_and_paddle()  # Breakout places the ball per life
+        cv = Canvas(oled, upside_down)
+        for _ in range(frames):
+            module.draw_game(cv)  # Ends with cv.show()
+        return frames
+    return run
+
+def build_scenarios(frames):
+    # Import everything up front so module loading doesn't count as heap growth
+    import oled_functions, menu, first_boot, canvas  # noqa: F401
+    scenarios = []
+    for mood in oled_functions.FACES:
+        scenarios.append(("mood:" + mood, mood_scenario(mood), frames))
+    scenarios.append(("menu", menu_scenario, 8))
+    scenarios.append(("first_boot", first_boot_scenario, 1))
+    for name in GAMES:
+        scenarios.append(("game:" + name, game_scenario(name), 1))
+    return scenarios
+
+# ------------------------------  RUNNER  ------------------------------
+
+def run_scenario(func, upside_down, frames):
+    oled = _make_display()
+    random.seed(0)
+    counters.reset()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    frames = func(oled, upside_down, frames)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    row = dict(counters.stats)
+    row["frames"] = frames
+    row["i2c_B"] = row["cmd_bytes"] + row["data_bytes"]
+    row["B/show"] = row["i2c_B"] // row["shows"] if row["shows"] else 0
+    row["heap_B"] = max(0, peak - base)
+    return row
+
+COLUMNS = ["frames", "shows", "px_ops", "fill_rect", "blit", "text", "fb_new", "i2c_B", "B/show", "heap_B"]
+
+def print_table(results):
+    name_w = max(len("scenario"), max(len(name) for name, _ in results))
+    widths = [max(len(c), max(len(str(row[c])) for _, row in results)) for c in COLUMNS]
+    print("scenario".ljust(name_w) + "".join("  " + c.rjust(w) for c, w in zip(COLUMNS, widths)))
+    print("-" * (name_w + sum(w + 2 for w in widths)))
+    for name, row in results:
+        print(name.ljust(name_w) + "".join("  " + str(row[c]).rjust(w) for c, w in zip(COLUMNS, widths)))
+
+def main():
+    ap = argparse.ArgumentParser(description="Host-side render and I2C benchmark")
+    ap.add_argument("--frames", type=int, default=100, help="main loop ticks per mood scenario (default 100)")
+    ap.add_argument("--software-flip", action="store_true",
+                    help="draw upside down in software instead of relying on the panel's hardware flip")
+    ap.add_argument("--only", help="run scenarios whose name contains this text")
+    ap.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    args = ap.parse_args()
+    if args.json:
+        args.json = os.path.abspath(args.json)  # Relative to the caller, not the bench's chdirs
+
+    # The firmware reads and writes its json files in the working directory
+    workdir = tempfile.mkdtemp(prefix="sidekick-bench-")
+    shutil.copy(REPO / "default_core.json", workdir)
+    os.chdir(workdir)
+    try:
+        import oled_functions
+        if not args.software_flip:
+            oled_functions.set_face_orientations((False,))
+        results = []
+        for name, func, frames in build_scenarios(args.frames):
+            if args.only and args.only not in name:
+                continue
+            results.append((name, run_scenario(func, args.software_flip, frames)))
+        if not args.only:
+            missing = set(oled_functions.FACES) - _moods_drawn
+            assert not missing, f"mood scenarios never drew: {sorted(missing)}"
+    finally:
+        os.chdir(REPO)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({name: row for name, row in results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
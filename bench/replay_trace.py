@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+replay_trace – replay a recorded accelerometer trace on the host
+
+Feeds a trace recorded on the device (menu > Record Trace, then download
+it from the web server at /api/trace) through the same gesture engine and
+mood code main.py runs (gestures.py, mood.py), under CPython and as fast as
+it can go. Prints every gesture and mood change with its time in the trace,
+then the per-step cost of the decision logic:
+
+  step       one main loop: interrupts, gesture engine, mood
+  mean/p50/p95/max   host time per step, in microseconds
+  speedup    trace duration / replay time
+
+Time is virtual (the trace's own timestamps), so runs are deterministic and
+two replays of the same trace can be diffed to check a threshold change.
+
+Usage:
+    python bench/replay_trace.py TRACE [--quiet] [--verbose] [--json FILE]
+    python bench/replay_trace.py --synthetic FILE   # write a scripted trace, then replay it
+    python bench/replay_trace.py --synthetic FILE --check   # fail if its 1 s shake costs all trust
+"""
+
+import argparse, contextlib, io, json, math, random, sys, time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(REPO / "bench" / "fakes"), str(REPO)]
+
+# ------------------------------  VIRTUAL CLOCK  ------------------------------
+
+_now = [0]
+
+time.ticks_ms = lambda: _now[0]
+time.ticks_diff = lambda a, b: a - b
+time.ticks_add = lambda a, b: a + b
+time.sleep_ms = lambda ms: None
+
+import gestures, sensor_trace  # noqa: E402
+from ADXL345 import ADXL345  # noqa: E402
+from mood import Mood  # noqa: E402
+
+LOOP_MS = 50            # main.py's loop period
+SAMPLE_HZ = 400         # ADXL345 data rate of the active profile
+FIFO_DEPTH = ADXL345.FIFO_DEPTH
+
+# ------------------------------  SYNTHETIC TRACE  ------------------------------
+
+def _still(t):
+    return 0, 0, 256
+
+def _stroll(t):
+    return 120 * math.sin(2 * math.pi * 0.8 * t), 80 * math.sin(2 * math.pi * 0.6 * t), 256
+
+def _pat(t):
+    return 0, 0, 256 + 40 * math.sin(2 * math.pi * 3 * t)
+
+def _shake(t):
+    return 500 * math.sin(2 * math.pi * 5 * t), 0, 256
+
+def _lift(t):
+    return 0, 0, 256 + 500 * math.sin(2 * math.pi * 1.5 * t) if (t % 1) < 0.33 else 256
+
+# (seconds, motion, interrupt flags raised at the start of the segment)
+SCRIPT = [
+    (3, _still, 0),
+    (4, _stroll, ADXL345.INT_ACTIVITY),
+    (4, _pat, 0),
+    (1, _shake, 0),
+    (2, _still, 0),
+    (1, _lift, 0),
+    (2, _still, 0),
+    (0.5, _still, ADXL345.INT_FREE_FALL),
+    (1, _still, ADXL345.INT_INACTIVITY),
+]
+
+def write_synthetic(path, seed=1):
+    """Record SCRIPT through sensor_trace, as main.py would on the device"""
+    rng = random.Random(seed)
+    _now[0] = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        sensor_trace.start(path)
+    idle = False
+    for seconds, motion, flags in SCRIPT:
+        events = flags
+        for _ in range(int(seconds * 1000 / LOOP_MS)):
+            _now[0] += LOOP_MS
+            if events & ADXL345.INT_ACTIVITY:
+                idle = False
+            elif events & ADXL345.INT_INACTIVITY:
+                idle = True
+            if idle:
+                sensor_trace.record(events, ())
+            else:
+                # Every sample taken since the last loop (the FIFO keeps at most FIFO_DEPTH)
+                samples = []
+                count = min(FIFO_DEPTH, LOOP_MS * SAMPLE_HZ // 1000)
+                for k in range(count):
+                    t = _now[0] / 1000 - (count - 1 - k) / SAMPLE_HZ
+                    samples.extend(int(v + rng.gauss(0, 1.5)) for v in motion(t))
+                sensor_trace.record(events, samples)
+            events = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        sensor_trace.stop()
+
+# ------------------------------  REPLAY  ------------------------------
+
+def replay(path, verbose=False, quiet=False):
+    engine = gestures.GestureEngine()
+    mood = Mood()
+    idle = False
+    face = "happy"
+    happy = mood.happy_level
+    lowest = happy
+    costs = []
+    counts = {}
+    transitions = []
+    samples_total = 0
+    last_ms = 0
+
+    out = sys.stdout
+
+    def note(ms, text):
+        transitions.append((ms, text))
+        if not quiet:
+            print(f"{ms / 1000:8.2f}s  {text}", file=out)
+
+    # The firmware prints its reactions; keep them out of the report unless asked
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with open(path, "rb") as f, sink:
+        for ms, events, samples in sensor_trace.records(f):
+            # Loops without a record only update the face (reactions expiring)
+            for tick in range(last_ms + LOOP_MS, ms, LOOP_MS):
+                new = mood.face(tick)
+                if new != face:
+                    note(tick, f"mood  {face} -> {new}")
+                    face = new
+            last_ms = ms
+            _now[0] = ms
+
+            start = time.perf_counter_ns()
+            if events & ADXL345.INT_ACTIVITY:
+                idle = False
+            elif events & ADXL345.INT_INACTIVITY:
+                idle = True
+                engine.reset()
+            if events & sensor_trace.MARK_RESET:
+                engine.reset()
+            engine.feed_interrupts(events)
+            if not idle:
+                engine.feed(samples)
+            fired = []
+            gesture = engine.pop()
+            while gesture:
+                fired.append((gesture, mood.on_gesture(gesture, ms)))
+                gesture = engine.pop()
+            new = mood.face(ms)
+            costs.append(time.perf_counter_ns() - start)
+
+            samples_total += len(samples) // 3
+            for gesture, reacted in fired:
+                name = gestures.NAMES[gesture]
+                counts[name] = counts.get(name, 0) + 1
+                note(ms, f"gesture {name}" if reacted else f"gesture {name} (ignored, refractory)")
+            if new != face:
+                note(ms, f"mood  {face} -> {new}")
+                face = new
+            if mood.happy_level != happy:
+                note(ms, f"happy {happy:g} -> {mood.happy_level:g}")
+                happy = mood.happy_level
+                lowest = min(lowest, happy)
+
+    costs.sort()
+    n = len(costs)
+    wall = sum(costs)
+    summary = {
+        "steps": n,
+        "samples": samples_total,
+        "duration_s": last_ms / 1000,
+        "mean_us": round(wall / n / 1000, 1) if n else 0,
+        "p50_us": round(costs[n // 2] / 1000, 1) if n else 0,
+        "p95_us": round(costs[min(n - 1, n * 95 // 100)] / 1000, 1) if n else 0,
+        "max_us": round(costs[-1] / 1000, 1) if n else 0,
+        "speedup": round(last_ms * 1e6 / wall) if wall else 0,
+        "gestures": counts,
+        "final_happy": mood.happy_level,
+        "lowest_happy": lowest,
+        "transitions": [[ms, text] for ms, text in transitions],
+    }
+    return summary
+
+def print_summary(s):
+    print()
+    print(f"steps {s['steps']}  samples {s['samples']}  trace {s['duration_s']:.2f}s  speedup x{s['speedup']}")
+    print(f"step cost (us)  mean {s['mean_us']}  p50 {s['p50_us']}  p95 {s['p95_us']}  max {s['max_us']}")
+    gestures_seen = ", ".join(f"{name} {count}" for name, count in sorted(s["gestures"].items())) or "none"
+    print(f"gestures  {gestures_seen}")
+    print(f"final happiness  {s['final_happy']:g}  lowest {s['lowest_happy']:g}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay an accelerometer trace through the gesture and mood logic")
+    ap.add_argument("trace", nargs="?", help="trace file downloaded from /api/trace")
+    ap.add_argument("--synthetic", metavar="FILE",
+                    help="write a scripted trace (still, stroll, pats, shake, lift, fall) to FILE and replay it")
+    ap.add_argument("--quiet", action="store_true", help="only print the summary")
+    ap.add_argument("--verbose", action="store_true", help="also show what the firmware prints")
+    ap.add_argument("--json", metavar="FILE", help="also write the summary and transitions as JSON")
+    ap.add_argument("--check", action="store_true",
+                    help="exit with an error if trust was lost (happiness hit 0); the --synthetic "
+                         "trace's 1 s shake must not do that")
+    args = ap.parse_args()
+
+    path = args.trace
+    if args.synthetic:
+        write_synthetic(args.synthetic)
+        path = args.synthetic
+    if not path:
+        ap.error("give a trace file or --synthetic FILE")
+
+    summary = replay(path, args.verbose, args.quiet)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    if args.check and summary["lowest_happy"] <= 0:
+        sys.exit("check failed: trust was lost (happiness hit 0)")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
-from machine import Pin, PWM
+from machine import Pin, PWM, Timer
+from array import array
 import time
 import random
 
 from pin_values import buzzer_pin_value#, led_pin_value
 import settings_store
-import ujson as json
+import core_assets
 
 # Initialize PWM for the buzzer and digital output for the LED
 buzzer = PWM(Pin(buzzer_pin_value))
@@ -13,29 +14,6 @@ buzzer.duty_u16(0)  # Ensure buzzer is silent at startup
 #led = Pin(led_pin_value, Pin.OUT)
 #led.value(0)        # Ensure LED is off at startup
 
-# Core data cache
-_core_cache = None
-
-def _load_core():
-    global _core_cache
-    if _core_cache is not None:
-        return _core_cache
-    # Decide file: custom_core.json preferred if valid
-    for fname in ("custom_core.json", "default_core.json"):
-        try:
-            with open(fname, "r") as f:
-                data = json.load(f)
-            # minimal validation
-            if "sounds" in data:
-                _core_cache = data
-                return _core_cache
-        except Exception:
-            continue
-    _core_cache = {"sounds": {}}
-    return _core_cache
-
-_core = _load_core()
-
 # Provide default sequences if core missing
 _DEFAULT_SEQUENCES = {
     "happy_sound": [[1319,18],[1568,18],[1760,18],[2093,18],[2349,18],[2637,40]],
@@ -49,6 +27,29 @@ _DEFAULT_SEQUENCES = {
     "buzzer_beeping": [[1000, 100], [0, 50], [1000, 100], [0, 50], [1000, 100]],
 }
 
+# Every playable sound as a flat array('H'): freq, duration, freq, duration, ...
+# The defaults are compiled once; the core's sounds (already flat, "follow"
+# chains appended, see core_assets) replace them whenever the core loads.
+_DEFAULT_ARRAYS = {name: array('H', [v for note in seq for v in note])
+                   for name, seq in _DEFAULT_SEQUENCES.items()}
+_sounds = {}
+_core_has_shook = False
+
+
+def _reload_sounds():
+    global _sounds, _core_has_shook
+    sounds = dict(_DEFAULT_ARRAYS)
+    core = core_assets.sounds()
+    for name, seq in core.items():
+        if len(seq) >= 2:
+            sounds[name] = seq
+    _core_has_shook = len(core.get("shook_sound", ())) >= 2
+    _sounds = sounds
+
+
+_reload_sounds()
+core_assets.subscribe(_reload_sounds)
+
 # --- Low-level helpers ---
 def startup_shush():
     """Ensure the buzzer is silent at startup."""
@@ -56,6 +57,7 @@ def startup_shush():
 
 
 def play_tone(freq, duration):
+    stop()  # A blocking tone takes over from a sequence in progress
     if settings_store.is_muted():
         time.sleep_ms(duration)
         return
@@ -68,87 +70,162 @@ def play_tone(freq, duration):
     #led.value(0)
 
 
-def _play_sequence(name):
-    sounds = _core.get("sounds", {})
-    snd = sounds.get(name)
-    if not snd:
-        seq = _DEFAULT_SEQUENCES.get(name, [])
-        for freq, dur in seq:
-            play_tone(freq, dur)
-        return
-    seq = snd.get("sequence", [])
-    if not seq:
-        seq = _DEFAULT_SEQUENCES.get(name, [])
-    for pair in seq:
+def _play_sequence(name, jitter=0):
+    """Play a sound to the end before returning"""
+    seq = _sounds.get(name, ())
+    for i in range(0, len(seq) - 1, 2):
+        freq = seq[i]
+        if jitter and freq:
+            freq = max(1, freq + random.randint(-jitter, jitter))
+        play_tone(freq, seq[i + 1])
+
+
+# --- Non-blocking sequence player ---
+# A sound's precompiled array is stepped note by note from a one-shot
+# hardware timer, so play() returns at once and the caller keeps running
+# while it sounds. The timer callback only indexes the array: no lookups,
+# conversions or allocations between notes.
+PLAYER_TIMER_ID = 1  # Timer 0 flushes the display
+
+_seq = array('H')    # Sound in progress
+_seq_len = 0         # Used entries of _seq (2 per note)
+_seq_pos = 0
+_jitter = 0
+_muted = False
+_playing = False
+_timer = None
+_timer_failed = False
+
+
+def _get_timer():
+    global _timer, _timer_failed
+    if _timer is None and not _timer_failed:
         try:
-            freq, dur = pair
-            play_tone(int(freq), int(dur))
-        except Exception:
-            pass
-    follow = snd.get("follow")
-    if follow:
-        _play_sequence(follow)
+            _timer = Timer(PLAYER_TIMER_ID)
+        except (ValueError, OSError):
+            _timer_failed = True
+    return _timer
+
+
+def _step(_t=None):
+    global _seq_pos, _playing
+    pos = _seq_pos
+    if pos >= _seq_len:
+        buzzer.duty_u16(0)
+        _playing = False
+        return
+    done = True
+    try:
+        freq = _seq[pos]
+        _seq_pos = pos + 2
+        if freq and not _muted:
+            if _jitter:
+                freq = max(1, freq + random.randint(-_jitter, _jitter))
+            buzzer.freq(freq)
+            buzzer.duty_u16(32768)  # 50% duty cycle
+        else:
+            buzzer.duty_u16(0)
+        _timer.init(mode=Timer.ONE_SHOT, period=max(1, _seq[pos + 1]), callback=_step)
+        done = False
+    finally:
+        if done:
+            # Failed mid-sound: end it rather than leave wait()/play_async() hanging
+            buzzer.duty_u16(0)
+            _playing = False
+
+
+def play(name, jitter=0):
+    """Start playing a sound and return at once, cutting off any sound in progress"""
+    global _seq, _seq_len, _seq_pos, _jitter, _muted, _playing
+    stop()
+    seq = _sounds.get(name)
+    if seq is None:
+        return
+    if _get_timer() is None:
+        # No timer to spare: play it the blocking way
+        _play_sequence(name, jitter)
+        return
+    _seq = seq
+    _seq_len = len(seq) & ~1
+    _seq_pos = 0
+    _jitter = jitter
+    _muted = settings_store.is_muted()
+    _playing = True
+    _step()
 
-# Public wrappers preserve existing API
 
+def is_playing():
+    return _playing
+
+
+def stop():
+    """Silence the sound in progress"""
+    global _playing
+    if _playing:
+        _timer.deinit()
+        _playing = False
+    buzzer.duty_u16(0)
+
+
+def wait():
+    """Block until the sound in progress has finished"""
+    while _playing:
+        time.sleep_ms(5)
+
+
+async def play_async(name):
+    """Play a sound from a uasyncio task and return when it has finished"""
+    import uasyncio as asyncio
+    # Slight pitch jitter for shook_sound, as shook_sound() does
+    play(name, 20 if name == "shook_sound" else 0)
+    try:
+        while _playing:
+            await asyncio.sleep_ms(10)
+    finally:
+        stop()  # Silent if the task is cancelled mid-sound
+
+# Public wrappers preserve existing API
+# They start the sound and return; use wait() to block until it ends
 def happy_sound():
-    _play_sequence("happy_sound")
+    play("happy_sound")
 
 
 def angry_sound():
-    _play_sequence("angry_sound")
+    play("angry_sound")
 
 
 def shook_sound():
     # Optionally randomize by slight pitch jitter if defined
-    snd = _core.get("sounds", {}).get("shook_sound")
-    if snd and snd.get("sequence"):
-        for pair in snd["sequence"]:
-            try:
-                freq, dur = pair
-                if freq > 0:
-                    freq += random.randint(-20, 20)
-                play_tone(int(freq), int(dur))
-            except Exception:
-                pass
-    else:
-        _play_sequence("shook_sound")
+    play("shook_sound", 20 if _core_has_shook else 0)
 
 
 def headpat_sound():
-    _play_sequence("headpat_sound")
+    play("headpat_sound")
 
 
 def click_sound():
-    _play_sequence("click_sound")
+    play("click_sound")
 
 
 def startup_sequence():
-    _play_sequence("startup_sequence")
+    play("startup_sequence")
 
 
 def curious_scared_sound():
-    _play_sequence("curious_scared_sound")
+    play("curious_scared_sound")
 
 
 def eepy_sound():
-    _play_sequence("eepy_sound")
+    play("eepy_sound")
 
 def buzzer_beeping():
-    _play_sequence("buzzer_beeping")
+    play("buzzer_beeping")
 
 # Run test sequence if the script is executed directly
 if __name__ == "__main__":
     startup_shush()
-    startup_sequence()
-    time.sleep_ms(500)
-    happy_sound()
-    time.sleep_ms(500)
-    angry_sound()
-    time.sleep_ms(500)
-    shook_sound()
-    time.sleep_ms(500)
-    curious_scared_sound()
-    time.sleep_ms(500)
-    eepy_sound()
+    for sound in (startup_sequence, happy_sound, angry_sound, shook_sound, curious_scared_sound, eepy_sound):
+        sound()
+        wait()
+        time.sleep_ms(500)
 
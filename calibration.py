@@ -0,0 +1,76 @@
+# Accelerometer offset calibration
+# Measures the zero-g error of each axis once, with the bot lying flat and
+# still, and trims it out in the ADXL345 itself through the OFSX/OFSY/OFSZ
+# registers. The values are saved with the settings and written back at
+# boot, so main.py and the apps read calibrated samples without each one
+# averaging readings first.
+
+from time import sleep_ms
+import settings_store
+
+SAMPLES = 64                # Readings averaged (~0.3 s)
+ONE_G = 256                 # Raw units per g (full resolution)
+FLAT_TOLERANCE = 64         # Gravity axis must read 1g within this to count as lying flat
+STILL_RANGE = 24            # Max spread of an axis over the readings (~0.1 g)
+
+def apply(adxl):
+    """Write the saved offsets to the sensor. Returns False if there are none"""
+    offsets = settings_store.get_accel_offsets()
+    if not offsets:
+        return False
+    try:
+        adxl.set_offsets(offsets[0], offsets[1], offsets[2])
+    except (OSError, AttributeError):
+        return False
+    return True
+
+def _average(adxl):
+    sample = [0, 0, 0]
+    totals = [0, 0, 0]
+    lows = [32767, 32767, 32767]
+    highs = [-32768, -32768, -32768]
+    for _ in range(SAMPLES):
+        adxl.read_accel_into(sample)
+        for k in range(3):
+            v = sample[k]
+            totals[k] += v
+            if v < lows[k]:
+                lows[k] = v
+            if v > highs[k]:
+                highs[k] = v
+        sleep_ms(5)
+    spread = max(highs[k] - lows[k] for k in range(3))
+    return [t // SAMPLES for t in totals], spread
+
+def calibrate(adxl, save=True):
+    """Measure and apply per-axis offsets with the bot lying still on any face
+
+    Returns the offset register values (x, y, z), or None if the bot was
+    moving or not lying flat (the previous offsets are then kept).
+    """
+    adxl.set_offsets(0, 0, 0)
+    sleep_ms(20)
+    if adxl.fifo_enabled:
+        adxl.read_fifo()  # Drop samples taken with the old offsets
+    avg, spread = _average(adxl)
+    # The axis gravity pulls on should read exactly ±1g, the others 0
+    axis = 0
+    for k in (1, 2):
+        if abs(avg[k]) > abs(avg[axis]):
+            axis = k
+    if spread > STILL_RANGE or abs(abs(avg[axis]) - ONE_G) > FLAT_TOLERANCE:
+        apply(adxl)
+        return None
+    if avg[axis] > 0:
+        avg[axis] -= ONE_G
+    else:
+        avg[axis] += ONE_G
+    offsets = []
+    for error in avg:
+        # Round to the nearest register step, within the register's range
+        step = (abs(error) + adxl.OFS_SCALE // 2) // adxl.OFS_SCALE
+        offsets.append(max(-128, min(127, -step if error > 0 else step)))
+    adxl.set_offsets(offsets[0], offsets[1], offsets[2])
+    if save:
+        settings_store.set_accel_offsets(offsets)
+    return tuple(offsets)
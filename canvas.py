@@ -0,0 +1,76 @@
+# Shared drawing surface for apps and games
+# Wraps the SSD1306 framebuffer with the primitives the bundled games use.
+# Everything is drawn in normal coordinates; when the panel can't flip in
+# hardware (see display.Display), show() writes the finished frame rotated
+# 180 degrees into a separate output buffer and sends that, so the drawing
+# buffer is never touched and no primitive has to be mirrored.
+
+def _reverse_bits(b):
+    r = 0
+    for _ in range(8):
+        r = (r << 1) | (b & 1)
+        b >>= 1
+    return r
+
+_REVERSED = bytes(_reverse_bits(b) for b in range(256))
+
+def _rotate180(src, dst):
+    """Write the MONO_VLSB frame src into dst rotated by 180 degrees"""
+    # Pixel (x, y) lives at byte page*w + x, bit y%8; its rotated position is
+    # the mirrored byte index with the bit order reversed.
+    rev = _REVERSED
+    j = len(src) - 1
+    for i in range(j + 1):
+        dst[j - i] = rev[src[i]]
+
+class Canvas:
+    def __init__(self, oled, upside_down=False):
+        self.oled = oled
+        self.width = oled.width
+        self.height = oled.height
+        self.upside_down = upside_down
+        self._flipped = None    # Output buffer for the rotated frame, made on first use
+        # Plain primitives go straight to the framebuffer
+        self.pixel = oled.pixel
+        self.hline = oled.hline
+        self.vline = oled.vline
+        self.rect = oled.rect
+        self.fill_rect = oled.fill_rect
+
+    def clear(self, c=0):
+        self.oled.fill(c)
+
+    def rounded_rect(self, x, y, w, h, r, c=1):
+        """Outline with the corners cut by r, dotted inside each corner"""
+        o = self.oled
+        o.hline(x + r, y, w - 2 * r, c)  # Top
+        o.hline(x + r, y + h - 1, w - 2 * r, c)  # Bottom
+        o.vline(x, y + r, h - 2 * r, c)  # Left
+        o.vline(x + w - 1, y + r, h - 2 * r, c)  # Right
+        # Corners
+        o.pixel(x + r - 1, y + r - 1, c)
+        o.pixel(x + w - r, y + r - 1, c)
+        o.pixel(x + r - 1, y + h - r, c)
+        o.pixel(x + w - r, y + h - r, c)
+
+    def sprite(self, fb, x, y, key=0):
+        """Blit a FrameBuffer sprite, pixels of colour key are transparent"""
+        self.oled.blit(fb, x, y, key)
+
+    def text(self, s, x, y, c=1):
+        """8x8 text, characters that start past the right edge are dropped"""
+        visible = (self.width - x + 7) // 8
+        if visible <= 0:
+            return
+        if len(s) > visible:
+            s = s[:visible]
+        self.oled.text(s, x, y, c)
+
+    def show(self):
+        if not self.upside_down:
+            self.oled.show()
+            return
+        if self._flipped is None:
+            self._flipped = memoryview(bytearray(len(self.oled.buffer)))
+        _rotate180(self.oled.buffer, self._flipped)
+        self.oled.show(self._flipped)
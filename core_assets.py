@@ -0,0 +1,270 @@
+# Personality core assets, loaded once and shared
+# A core has "faces", "animations", "sounds" and "display" sections. The
+# selected core (settings core_type: custom or default) is loaded section by
+# section on first use and kept here for oled_functions, buzzer_sounds and
+# menu alike. A custom core may leave out sections; those come from the
+# default core. Modules that derive state from the core subscribe() and are
+# called back when invalidate() drops it, e.g. after the core type is toggled
+# in the menu.
+#
+# Each core is read from its compiled form (default_core.bin, written by
+# core_compiler.py at upload) when there is one: only the requested
+# section is read, faces share one string table and every sound is an
+# array('H') of freq, duration, freq, duration, ... with its "follow" chain
+# already appended. Without a .bin (or with one older than the JSON) the
+# JSON is parsed and validated into the same shapes.
+
+import os
+import struct
+import ujson as json
+from array import array
+import settings_store
+
+DEFAULT_CORE = "default_core.json"
+CUSTOM_CORE = "custom_core.json"
+SECTIONS = ("faces", "animations", "sounds", "display")
+
+# Binary core format (see core_compiler.py)
+MAGIC = b"SKCR"
+VERSION = 1
+HEADER = "<4sBBHI"
+INDEX = "<4sII"
+TAGS = {"faces": b"FACE", "animations": b"ANIM", "sounds": b"SNDS", "display": b"DISP"}
+
+_sections = {}
+_indexes = {}                   # Core JSON name -> index of its .bin (None: no usable .bin)
+_parsed = {}                    # Core JSON name -> validated JSON, when there is no .bin
+_custom_available = None
+_subscribers = []
+
+# --- JSON cores ---
+def _read(fname):
+    try:
+        with open(fname, "r") as f:
+            data = json.load(f)
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
+
+def _valid_faces(faces):
+    out = {}
+    if isinstance(faces, dict):
+        for mood, seq in faces.items():
+            if isinstance(seq, list):
+                seq = [face for face in seq if isinstance(face, str) and face]
+                if seq:
+                    out[mood] = seq
+    return out
+
+def _notes(snd):
+    values = []
+    for pair in snd.get("sequence") or ():
+        try:
+            freq, dur = pair
+            values.append(min(max(int(freq), 0), 0xFFFF))
+            values.append(min(max(int(dur), 0), 0xFFFF))
+        except Exception:
+            pass
+    return values
+
+def _valid_sounds(sounds):
+    out = {}
+    if isinstance(sounds, dict):
+        for name, snd in sounds.items():
+            if not isinstance(snd, dict):
+                continue
+            # Append the "follow" chain, stopping if it loops back
+            values = _notes(snd)
+            seen = {name}
+            follow = snd.get("follow")
+            while isinstance(follow, str) and isinstance(sounds.get(follow), dict) and follow not in seen:
+                seen.add(follow)
+                values += _notes(sounds[follow])
+                follow = sounds[follow].get("follow")
+            out[name] = array('H', values)
+    return out
+
+def _valid_dict_of_dicts(section):
+    if not isinstance(section, dict):
+        return {}
+    return {k: v for k, v in section.items() if isinstance(v, dict)}
+
+def _validate(data):
+    """Keep the well-formed parts of each section; missing sections stay missing"""
+    core = {}
+    if "faces" in data:
+        core["faces"] = _valid_faces(data["faces"])
+    if "animations" in data:
+        core["animations"] = _valid_dict_of_dicts(data["animations"])
+    if "sounds" in data:
+        core["sounds"] = _valid_sounds(data["sounds"])
+    if isinstance(data.get("display"), dict):
+        core["display"] = data["display"]
+    return core
+
+# --- Binary cores ---
+def _bin_name(fname):
+    return fname[:-5] + ".bin"
+
+def _index(fname):
+    """Section index of fname's compiled core, or None if it has no usable one"""
+    if fname in _indexes:
+        return _indexes[fname]
+    index = None
+    try:
+        with open(_bin_name(fname), "rb") as f:
+            head = f.read(struct.calcsize(HEADER))
+            magic, version, count, _, source_size = struct.unpack(HEADER, head)
+            if magic == MAGIC and version == VERSION:
+                try:
+                    stale = os.stat(fname)[6] != source_size  # JSON replaced since compiling
+                except OSError:
+                    stale = False       # Only the .bin was uploaded
+                if not stale:
+                    index = {}
+                    size = struct.calcsize(INDEX)
+                    for _ in range(count):
+                        tag, offset, length = struct.unpack(INDEX, f.read(size))
+                        index[tag] = (offset, length)
+    except Exception:
+        index = None
+    _indexes[fname] = index
+    return index
+
+def _read_bin(fname, offset, length):
+    with open(_bin_name(fname), "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+def _decode_faces(data):
+    strings = []
+    count = struct.unpack_from("<H", data, 0)[0]
+    pos = 2
+    for _ in range(count):
+        n = data[pos]
+        strings.append(str(data[pos + 1:pos + 1 + n], "utf-8"))
+        pos += 1 + n
+    faces = {}
+    count = struct.unpack_from("<H", data, pos)[0]
+    pos += 2
+    for _ in range(count):
+        n = data[pos]
+        mood = str(data[pos + 1:pos + 1 + n], "utf-8")
+        pos += 1 + n
+        n = data[pos]
+        refs = struct.unpack_from("<%dH" % n, data, pos + 1)
+        faces[mood] = [strings[i] for i in refs]
+        pos += 1 + 2 * n
+    return faces
+
+def _decode_sounds(fname, offset):
+    # Names and lengths first, then every note value in one buffer
+    with open(_bin_name(fname), "rb") as f:
+        f.seek(offset)
+        count = struct.unpack("<H", f.read(2))[0]
+        heads = []
+        total = 0
+        for _ in range(count):
+            name = str(f.read(f.read(1)[0]), "utf-8")
+            n = struct.unpack("<H", f.read(2))[0]
+            heads.append((name, n))
+            total += n
+        values = array('H', bytes(2 * total))
+        f.readinto(values)
+    mv = memoryview(values)
+    sounds = {}
+    pos = 0
+    for name, n in heads:
+        sounds[name] = mv[pos:pos + n]
+        pos += n
+    return sounds
+
+def _load_bin(fname, index, name):
+    offset, length = index[TAGS[name]]
+    if name == "sounds":
+        return _decode_sounds(fname, offset)
+    data = _read_bin(fname, offset, length)
+    if name == "faces":
+        return _decode_faces(data)
+    return json.loads(str(data, "utf-8"))
+
+# --- Sections ---
+def _parsed_core(fname):
+    """fname parsed and validated, once per invalidate"""
+    core = _parsed.get(fname)
+    if core is None:
+        core = _parsed[fname] = _validate(_read(fname) or {})
+    return core
+
+def _load_section(fname, name):
+    """Section name of the core fname, or None if that core lacks it"""
+    index = _index(fname)
+    if index is not None:
+        if TAGS[name] not in index:
+            return None
+        try:
+            return _load_bin(fname, index, name)
+        except Exception:
+            pass                # Damaged .bin: fall back to the JSON
+    return _parsed_core(fname).get(name)
+
+def _section(name):
+    value = _sections.get(name)
+    if value is None:
+        sources = (DEFAULT_CORE,)
+        if settings_store.get_core_type() == "Custom" and custom_available():
+            sources = (CUSTOM_CORE, DEFAULT_CORE)
+        for fname in sources:
+            value = _load_section(fname, name)
+            if value is not None:
+                break
+        else:
+            value = {}
+        _sections[name] = value
+    return value
+
+def get():
+    """The selected core as a dict with every section in SECTIONS"""
+    return {name: _section(name) for name in SECTIONS}
+
+def faces():
+    """mood -> list of face strings"""
+    return _section("faces")
+
+def animations():
+    """mood -> animation spec (see animation.py)"""
+    return _section("animations")
+
+def sounds():
+    """name -> array of freq, duration, freq, duration, ... ("follow" appended)"""
+    return _section("sounds")
+
+def display():
+    return _section("display")
+
+def custom_available():
+    """True if the custom core holds faces or sounds (checked once per invalidate)"""
+    global _custom_available
+    if _custom_available is None:
+        index = _index(CUSTOM_CORE)
+        if index is not None:
+            _custom_available = TAGS["faces"] in index or TAGS["sounds"] in index
+        else:
+            core = _parsed_core(CUSTOM_CORE)
+            _custom_available = "faces" in core or "sounds" in core
+    return _custom_available
+
+def subscribe(callback):
+    """Call callback() whenever the core is invalidated"""
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+def invalidate():
+    """Drop the loaded core (e.g. after toggling core_type or uploading a core)"""
+    global _custom_available
+    _sections.clear()
+    _indexes.clear()
+    _parsed.clear()
+    _custom_available = None
+    for callback in _subscribers:
+        callback()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+core_compiler – compile a personality core JSON into the binary core format
+
+The device reads `default_core.bin` / `custom_core.bin` (core_assets.py)
+instead of parsing the JSON with ujson: it seeks to the sections it needs,
+face strings come from one table, and every sound is a ready array('H') of
+(frequency, duration) pairs with its "follow" chain already appended.
+upload-to-esp32.py compiles the cores it uploads; run this by hand to check
+a core or see the sizes.
+
+Format, little endian:
+  header   "SKCR", version (u8), section count (u8), reserved (u16),
+           size of the source JSON in bytes (u32, lets the device spot a
+           .bin left over from an older JSON)
+  index    per section: tag (4s), offset (u32), length (u32)
+  FACE     string count (u16), then per string: length (u8), UTF-8 bytes;
+           mood count (u16), then per mood: name length (u8), name,
+           face count (u8), string indices (u16 each)
+  SNDS     sound count (u16), then per sound: name length (u8), name,
+           value count (u16); then all values (u16), sound after sound,
+           each sound freq, duration, freq, duration, ...
+  ANIM     the "animations" object as compact JSON
+  DISP     the "display" object as compact JSON
+Sections the JSON leaves out are left out of the index too, so a custom
+core still falls back to the default core for them.
+
+Usage:
+    python core_compiler.py CORE.json [-o CORE.bin]
+"""
+
+import argparse, json, struct, sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"SKCR"
+VERSION = 1
+HEADER = "<4sBBHI"
+INDEX = "<4sII"
+MAX_VALUES = 0xFFFF             # Values per sound (u16 count)
+
+
+class CoreError(ValueError):
+    pass
+
+
+def _name(text: str) -> bytes:
+    raw = text.encode("utf-8")
+    if len(raw) > 255:
+        raise CoreError(f"name too long: {text[:20]}…")
+    return bytes([len(raw)]) + raw
+
+
+# === Sections ================================================================
+def _faces(faces) -> bytes:
+    if not isinstance(faces, dict):
+        raise CoreError('"faces" must be an object')
+    strings: List[str] = []
+    ids: Dict[str, int] = {}
+    moods: List[Tuple[str, List[int]]] = []
+    for mood, seq in faces.items():
+        if not isinstance(seq, list):
+            continue  # e.g. the "core_type" marker
+        refs = []
+        for face in seq:
+            if not isinstance(face, str) or not face:
+                continue
+            if face not in ids:
+                ids[face] = len(strings)
+                strings.append(face)
+            refs.append(ids[face])
+        if refs:
+            if len(refs) > 255:
+                raise CoreError(f'mood "{mood}" has more than 255 faces')
+            moods.append((mood, refs))
+    out = bytearray(struct.pack("<H", len(strings)))
+    for face in strings:
+        out += _name(face)
+    out += struct.pack("<H", len(moods))
+    for mood, refs in moods:
+        out += _name(mood) + bytes([len(refs)]) + struct.pack(f"<{len(refs)}H", *refs)
+    return bytes(out)
+
+
+def _notes(snd) -> List[int]:
+    values = []
+    for pair in snd.get("sequence") or ():
+        try:
+            freq, dur = pair
+            values += [min(max(int(freq), 0), 0xFFFF), min(max(int(dur), 0), 0xFFFF)]
+        except (TypeError, ValueError):
+            pass
+    return values
+
+
+def _sounds(sounds) -> bytes:
+    if not isinstance(sounds, dict):
+        raise CoreError('"sounds" must be an object')
+    sounds = {name: snd for name, snd in sounds.items() if isinstance(snd, dict)}
+    heads = bytearray(struct.pack("<H", len(sounds)))
+    values: List[int] = []
+    for name, snd in sounds.items():
+        # Append the "follow" chain, stopping if it loops back
+        flat = _notes(snd)
+        seen = {name}
+        follow = snd.get("follow")
+        while isinstance(follow, str) and follow in sounds and follow not in seen:
+            seen.add(follow)
+            flat += _notes(sounds[follow])
+            follow = sounds[follow].get("follow")
+        if len(flat) > MAX_VALUES:
+            raise CoreError(f'sound "{name}" is too long')
+        heads += _name(name) + struct.pack("<H", len(flat))
+        values += flat
+    return bytes(heads) + struct.pack(f"<{len(values)}H", *values)
+
+
+def _object(value, key: str) -> bytes:
+    if not isinstance(value, dict):
+        raise CoreError(f'"{key}" must be an object')
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+SECTIONS = (
+    ("faces", b"FACE", _faces),
+    ("sounds", b"SNDS", _sounds),
+    ("animations", b"ANIM", lambda v: _object(v, "animations")),
+    ("display", b"DISP", lambda v: _object(v, "display")),
+)
+
+
+# === Compiler ================================================================
+def compile_core(data: dict, source_size: int = 0) -> bytes:
+    """Binary core for the parsed core JSON data"""
+    if not isinstance(data, dict):
+        raise CoreError("a core must be a JSON object")
+    blobs = [(tag, build(data[key])) for key, tag, build in SECTIONS if key in data]
+    offset = struct.calcsize(HEADER) + struct.calcsize(INDEX) * len(blobs)
+    out = bytearray(struct.pack(HEADER, MAGIC, VERSION, len(blobs), 0, source_size))
+    for tag, blob in blobs:
+        out += struct.pack(INDEX, tag, offset, len(blob))
+        offset += len(blob)
+    for _, blob in blobs:
+        out += blob
+    return bytes(out)
+
+
+def compile_file(src: Path, dst: Optional[Path] = None) -> Path:
+    """Compile src (a core JSON) to dst, by default src with a .bin suffix"""
+    raw = src.read_bytes()
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise CoreError(f"{src}: {e}") from None
+    dst = dst or src.with_suffix(".bin")
+    dst.write_bytes(compile_core(data, len(raw)))
+    return dst
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="core_compiler", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("core", type=Path, help="core JSON, e.g. default_core.json")
+    parser.add_argument("-o", "--output", type=Path, help="binary core to write (default: CORE.bin)")
+    args = parser.parse_args()
+    try:
+        dst = compile_file(args.core, args.output)
+    except (OSError, CoreError) as e:
+        sys.exit(f"core_compiler: {e}")
+    print(f"{args.core} ({args.core.stat().st_size} B) → {dst} ({dst.stat().st_size} B)")
+
+
+if __name__ == "__main__":
+    main()
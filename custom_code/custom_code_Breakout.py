@@ -4,8 +4,11 @@
 import random
 import math
 from time import sleep_ms, ticks_ms, ticks_diff
-from oled_functions import _text, DEFAULT_UPSIDE
+from oled_functions import DEFAULT_UPSIDE
+from canvas import Canvas
 from ADXL345 import ADXL345
+from sensor_service import SensorService
+import calibration
 from buzzer_sounds import play_tone
 
 # --- Game Constants ---
@@ -35,13 +38,6 @@ LIVES_total = 3
 game_state = {}
 best_score = 0 # Persist best score across games
 
-# --- Drawing Helper (to handle upside_down) ---
-def _draw_rect(oled, x, y, w, h, c, upside_down):
-    if upside_down:
-        oled.rect(SCREEN_WIDTH - x - w, SCREEN_HEIGHT - y - h, w, h, c)
-    else:
-        oled.rect(x, y, w, h, c)
-
 def reset_ball_and_paddle():
     game_state["paddle_x"] = (SCREEN_WIDTH - PADDLE_WIDTH) // 2
     game_state["paddle_vx"] = 0
@@ -56,7 +52,6 @@ def init_game():
     game_state = {
         "score": 0, "lives": LIVES_total, "bricks_left": BRICK_ROWS * BRICK_COLS,
         "game_over": False, "game_won": False,
-        "ax_offset": 0, "ay_offset": 0,
         "new_life_sequence": True,
         "paddle_vx": 0,
     }
@@ -66,66 +61,36 @@ def init_game():
             bricks.append({'x': c * BRICK_WIDTH, 'y': r * BRICK_HEIGHT + BRICK_Y_OFFSET, 'alive': True})
     game_state["bricks"] = bricks
 
-def countdown_and_calibrate(adxl, oled, upside_down):
-    global best_score
-    ax_total = 0
-    ay_total = 0
-    num_readings = 0
-
-    for i in range(3, 0, -1):
-        oled.fill(0)
-        _text(oled, "Keep device still", 0, 0, upside_down)
-        _text(oled, f"Score: {game_state['score']}", 0, 10, upside_down)
-        _text(oled, f"Best: {best_score}", 0, 20, upside_down)
-        _text(oled, str(i), 60, 40, upside_down)
-        oled.show()
-        
-        t_start = ticks_ms()
-        while ticks_diff(ticks_ms(), t_start) < 1000:
-            raw_ax, raw_ay, _ = adxl.read_accel_data()
-            if upside_down:
-                raw_ax = -raw_ax
-                raw_ay = -raw_ay
-            ax_total += raw_ax
-            ay_total += raw_ay
-            num_readings += 1
-            sleep_ms(20)
-
-    if num_readings > 0:
-        game_state["ax_offset"] = ax_total // num_readings
-        game_state["ay_offset"] = ay_total // num_readings
-
-def draw_game(oled, upside_down):
-    oled.fill(0)
+def draw_game(cv):
+    cv.clear()
     if game_state["game_over"]:
-        _text(oled, "Game Over", 32, 20, upside_down)
+        cv.text("Game Over", 32, 20)
     elif game_state["game_won"]:
-        _text(oled, "You Win!", 36, 20, upside_down)
+        cv.text("You Win!", 36, 20)
     
     if game_state["game_over"] or game_state["game_won"]:
-        _text(oled, f"Score: {game_state['score']}", 36, 32, upside_down)
-        oled.show()
+        cv.text(f"Score: {game_state['score']}", 36, 32)
+        cv.text(f"Best: {best_score}", 36, 42)
+        cv.show()
         return
 
-    _draw_rect(oled, int(game_state["paddle_x"]), PADDLE_Y, PADDLE_WIDTH, PADDLE_HEIGHT, 1, upside_down)
-    _draw_rect(oled, int(game_state["ball_x"]) - BALL_RADIUS, int(game_state["ball_y"]) - BALL_RADIUS, BALL_RADIUS*2, BALL_RADIUS*2, 1, upside_down)
+    cv.rect(int(game_state["paddle_x"]), PADDLE_Y, PADDLE_WIDTH, PADDLE_HEIGHT, 1)
+    cv.rect(int(game_state["ball_x"]) - BALL_RADIUS, int(game_state["ball_y"]) - BALL_RADIUS, BALL_RADIUS*2, BALL_RADIUS*2, 1)
     for brick in game_state["bricks"]:
         if brick['alive']:
-            _draw_rect(oled, brick['x'], brick['y'], BRICK_WIDTH - 1, BRICK_HEIGHT - 1, 1, upside_down)
+            cv.rect(brick['x'], brick['y'], BRICK_WIDTH - 1, BRICK_HEIGHT - 1, 1)
     
-    _text(oled, f"S:{game_state['score']} L:{game_state['lives']}", 0, 0, upside_down)
-    oled.show()
+    cv.text(f"S:{game_state['score']} L:{game_state['lives']}", 0, 0)
+    cv.show()
 
-def update_paddle_position(adxl, upside_down):
-    raw_ax, raw_ay, _ = adxl.read_accel_data()
+def update_paddle_position(motion, upside_down):
+    raw_ax, raw_ay, _ = motion.latest()
     if upside_down:
         raw_ax = -raw_ax
         raw_ay = -raw_ay
 
-    is_ax_control = abs(raw_ax - game_state["ax_offset"]) > abs(raw_ay - game_state["ay_offset"])
-    control_val = raw_ax if is_ax_control else raw_ay
-    offset = game_state["ax_offset"] if is_ax_control else game_state["ay_offset"]
-    effective_tilt = control_val - offset
+    # Offsets are trimmed in the sensor (calibration.py), so level reads 0
+    effective_tilt = raw_ax if abs(raw_ax) > abs(raw_ay) else raw_ay
     
     paddle_vx = 0
     if abs(effective_tilt) > ACCEL_DEAD_ZONE:
@@ -139,10 +104,10 @@ def update_paddle_position(adxl, upside_down):
     next_pos = game_state["paddle_x"] + paddle_vx
     game_state["paddle_x"] = max(0, min(next_pos, SCREEN_WIDTH - PADDLE_WIDTH))
 
-def update_game(adxl, upside_down):
+def update_game(motion, upside_down):
     if game_state["game_over"] or game_state["game_won"] or game_state.get("new_life_sequence", False): return
 
-    update_paddle_position(adxl, upside_down)
+    update_paddle_position(motion, upside_down)
 
     # --- Ball and Game Logic ---
     game_state["ball_x"] += game_state["ball_vx"]
@@ -174,7 +139,7 @@ def update_game(adxl, upside_down):
         if game_state["lives"] <= 0:
             game_state["game_over"] = True
         else:
-            game_state["new_life_sequence"] = True # Trigger countdown for next life
+            game_state["new_life_sequence"] = True # Trigger get ready phase for next life
         return
 
     if game_state["bricks_left"] <= 0:
@@ -186,10 +151,18 @@ def run(env):
     oled = env.get("oled"); i2c = env.get("i2c"); upside_down = env.get("upside_down", DEFAULT_UPSIDE)
     menu_button = env.get("menu_button"); ok_button = env.get("ok_button")
 
-    if not all([oled, i2c, menu_button, ok_button]): print("Missing required hardware"); return
+    sensors = env.get("sensors")
+
+    if not all([oled, sensors or i2c, menu_button, ok_button]): print("Missing required hardware"); return
+    cv = Canvas(oled, upside_down)
 
-    adxl = ADXL345(i2c)
-    if not adxl.available: _text(oled, "ADXL345 Error", 0, 0, upside_down); oled.show(); sleep_ms(2000); return
+    if sensors is None:
+        # Started without the shared sensor service: bring up our own
+        adxl = ADXL345(i2c)
+        if not adxl.available: cv.text("ADXL345 Error", 0, 0); cv.show(); sleep_ms(2000); return
+        calibration.apply(adxl)
+        sensors = SensorService(adxl)
+    motion = sensors.subscribe(rate_hz=60)
 
     while True:
         init_game()
@@ -200,13 +173,13 @@ def run(env):
                 sleep_ms(200); return
 
             if game_state.get("new_life_sequence"):
-                countdown_and_calibrate(adxl, oled, upside_down)
                 reset_ball_and_paddle()
                 # Get Ready Phase
                 t_start = ticks_ms()
                 while ticks_diff(ticks_ms(), t_start) < 1000:
-                    update_paddle_position(adxl, upside_down)
-                    draw_game(oled, upside_down)
+                    sensors.poll()
+                    update_paddle_position(motion, upside_down)
+                    draw_game(cv)
                     sleep_ms(16)
                 game_state["new_life_sequence"] = False
                 last_frame_time = ticks_ms()
@@ -215,18 +188,19 @@ def run(env):
             if ticks_diff(now, last_frame_time) < 16: continue
             last_frame_time = now
 
-            update_game(adxl, upside_down)
-            draw_game(oled, upside_down)
+            sensors.poll()  # One FIFO drain per frame feeds the paddle
+            update_game(motion, upside_down)
+            draw_game(cv)
 
         # --- Game Over / You Win Screen ---
         if game_state["score"] > best_score:
             best_score = game_state["score"]
             
-        draw_game(oled, upside_down)
+        draw_game(cv)
         sleep_ms(1000)
         
-        _text(oled, "OK:Retry Menu:Exit", 0, 50, upside_down)
-        oled.show()
+        cv.text("OK:Retry Menu:Exit", 0, 50)
+        cv.show()
 
         while True:
             if ok_button.value() == 0:
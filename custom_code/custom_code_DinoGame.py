@@ -3,7 +3,8 @@
 
 import random
 from time import sleep_ms, ticks_ms, ticks_diff
-from oled_functions import _text, DEFAULT_UPSIDE
+from oled_functions import DEFAULT_UPSIDE
+from canvas import Canvas
 from buzzer_sounds import play_tone
 
 # --- Game Constants ---
@@ -26,37 +27,6 @@ SPEED_INCREASE_AMOUNT = 0.1
 OBSTACLE_MIN_GAP = 80
 OBSTACLE_MAX_GAP = 150
 
-# --- Drawing Helpers (to handle upside_down) ---
-def _draw_pixel(oled, x, y, c, upside_down):
-    if upside_down:
-        oled.pixel(SCREEN_WIDTH - 1 - x, SCREEN_HEIGHT - 1 - y, c)
-    else:
-        oled.pixel(x, y, c)
-
-def _draw_hline(oled, x, y, w, c, upside_down):
-    if upside_down:
-        oled.hline(SCREEN_WIDTH - x - w, SCREEN_HEIGHT - 1 - y, w, c)
-    else:
-        oled.hline(x, y, w, c)
-
-def _draw_vline(oled, x, y, h, c, upside_down):
-    if upside_down:
-        oled.vline(SCREEN_WIDTH - 1 - x, SCREEN_HEIGHT - y - h, h, c)
-    else:
-        oled.vline(x, y, h, c)
-
-def _draw_rounded_rect(oled, x, y, w, h, r, c, upside_down):
-    """Draws a rounded rectangle. r is the corner radius."""
-    _draw_hline(oled, x + r, y, w - 2 * r, c, upside_down) # Top
-    _draw_hline(oled, x + r, y + h - 1, w - 2 * r, c, upside_down) # Bottom
-    _draw_vline(oled, x, y + r, h - 2 * r, c, upside_down) # Left
-    _draw_vline(oled, x + w - 1, y + r, h - 2 * r, c, upside_down) # Right
-    # Corners
-    _draw_pixel(oled, x + r - 1, y + r - 1, c, upside_down)
-    _draw_pixel(oled, x + w - r, y + r - 1, c, upside_down)
-    _draw_pixel(oled, x + r - 1, y + h - r, c, upside_down)
-    _draw_pixel(oled, x + w - r, y + h - r, c, upside_down)
-
 # --- Game State ---
 game_state = {}
 
@@ -68,42 +38,42 @@ def init_game():
         "obstacles": [], "next_obstacle_x": SCREEN_WIDTH + 20, "game_over": False,
     }
 
-def draw_player(oled, frame, upside_down):
+def draw_player(cv, frame):
     """Draws the abstract Sidekick character."""
     player_y = int(game_state["player_y"]) - PLAYER_HEIGHT
     # Body
-    _draw_rounded_rect(oled, PLAYER_X, player_y + 4, 10, 10, 2, 1, upside_down)
+    cv.rounded_rect(PLAYER_X, player_y + 4, 10, 10, 2, 1)
     # Head
-    _draw_rounded_rect(oled, PLAYER_X + 3, player_y, 4, 4, 1, 1, upside_down)
+    cv.rounded_rect(PLAYER_X + 3, player_y, 4, 4, 1, 1)
     # Leg animation
     if frame % 2 == 0:
-        _draw_vline(oled, PLAYER_X + 2, player_y + 14, 2, 1, upside_down)
-        _draw_vline(oled, PLAYER_X + 7, player_y + 14, 3, 1, upside_down)
+        cv.vline(PLAYER_X + 2, player_y + 14, 2, 1)
+        cv.vline(PLAYER_X + 7, player_y + 14, 3, 1)
     else:
-        _draw_vline(oled, PLAYER_X + 2, player_y + 14, 3, 1, upside_down)
-        _draw_vline(oled, PLAYER_X + 7, player_y + 14, 2, 1, upside_down)
+        cv.vline(PLAYER_X + 2, player_y + 14, 3, 1)
+        cv.vline(PLAYER_X + 7, player_y + 14, 2, 1)
 
-def draw_obstacle(oled, obs, upside_down):
+def draw_obstacle(cv, obs):
     x = int(obs['x'])
     h = obs['height']
     w = obs['width']
-    _draw_rounded_rect(oled, x, GROUND_Y - h, w, h, 2, 1, upside_down)
+    cv.rounded_rect(x, GROUND_Y - h, w, h, 2, 1)
 
-def draw_game(oled, upside_down):
-    oled.fill(0)
+def draw_game(cv):
+    cv.clear()
     if game_state["game_over"]:
-        _text(oled, "Game Over", 32, 20, upside_down)
-        _text(oled, f"Score: {int(game_state['score'])}", 28, 32, upside_down)
-        oled.show()
+        cv.text("Game Over", 32, 20)
+        cv.text(f"Score: {int(game_state['score'])}", 28, 32)
+        cv.show()
         return
 
-    _draw_hline(oled, 0, GROUND_Y, SCREEN_WIDTH, 1, upside_down)
+    cv.hline(0, GROUND_Y, SCREEN_WIDTH, 1)
     anim_frame = (int(game_state["score"]) // 5) % 2
-    draw_player(oled, anim_frame, upside_down)
+    draw_player(cv, anim_frame)
     for obs in game_state["obstacles"]:
-        draw_obstacle(oled, obs, upside_down)
-    _text(oled, f"HI {int(game_state['score'])}", 80, 0, upside_down)
-    oled.show()
+        draw_obstacle(cv, obs)
+    cv.text(f"HI {int(game_state['score'])}", 80, 0)
+    cv.show()
 
 def update_game(jump_button):
     if game_state["game_over"]: return
@@ -155,6 +125,7 @@ def run(env):
     jump_button = env.get("ok_button"); menu_button = env.get("menu_button")
 
     if not all([oled, jump_button, menu_button]): print("Missing required hardware"); return
+    cv = Canvas(oled, upside_down)
 
     while True:
         init_game()
@@ -168,12 +139,12 @@ def run(env):
             last_frame_time = now
 
             update_game(jump_button)
-            draw_game(oled, upside_down)
+            draw_game(cv)
 
-        draw_game(oled, upside_down)
+        draw_game(cv)
         sleep_ms(1000)
         
-        _text(oled, "Press OK", 32, 45, upside_down); oled.show()
+        cv.text("Press OK", 32, 45); cv.show()
         while jump_button.value() == 1:
             if menu_button.value() == 0: sleep_ms(500); return
             sleep_ms(50)
\ No newline at end of file
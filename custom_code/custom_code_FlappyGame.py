@@ -3,7 +3,8 @@
 
 import random
 from time import sleep_ms, ticks_ms, ticks_diff
-from oled_functions import _text, DEFAULT_UPSIDE
+from oled_functions import DEFAULT_UPSIDE
+from canvas import Canvas
 from buzzer_sounds import play_tone
 
 # --- Game Constants ---
@@ -22,41 +23,6 @@ PIPE_GAP_SIZE = 30
 PIPE_SPEED = 1.5
 PIPE_SPAWN_DISTANCE = 80
 
-# --- Drawing Helpers (to handle upside_down) ---
-def _draw_pixel(oled, x, y, c, upside_down):
-    if upside_down:
-        oled.pixel(SCREEN_WIDTH - 1 - x, SCREEN_HEIGHT - 1 - y, c)
-    else:
-        oled.pixel(x, y, c)
-
-def _draw_hline(oled, x, y, w, c, upside_down):
-    if upside_down:
-        oled.hline(SCREEN_WIDTH - x - w, SCREEN_HEIGHT - 1 - y, w, c)
-    else:
-        oled.hline(x, y, w, c)
-
-def _draw_vline(oled, x, y, h, c, upside_down):
-    if upside_down:
-        oled.vline(SCREEN_WIDTH - 1 - x, SCREEN_HEIGHT - y - h, h, c)
-    else:
-        oled.vline(x, y, h, c)
-
-def _draw_rect_filled(oled, x, y, w, h, c, upside_down):
-    if upside_down:
-        oled.fill_rect(SCREEN_WIDTH - x - w, SCREEN_HEIGHT - y - h, w, h, c)
-    else:
-        oled.fill_rect(x, y, w, h, c)
-
-def _draw_rounded_rect(oled, x, y, w, h, r, c, upside_down):
-    _draw_hline(oled, x + r, y, w - 2 * r, c, upside_down)
-    _draw_hline(oled, x + r, y + h - 1, w - 2 * r, c, upside_down)
-    _draw_vline(oled, x, y + r, h - 2 * r, c, upside_down)
-    _draw_vline(oled, x + w - 1, y + r, h - 2 * r, c, upside_down)
-    _draw_pixel(oled, x + r - 1, y + r - 1, c, upside_down)
-    _draw_pixel(oled, x + w - r, y + r - 1, c, upside_down)
-    _draw_pixel(oled, x + r - 1, y + h - r, c, upside_down)
-    _draw_pixel(oled, x + w - r, y + h - r, c, upside_down)
-
 # --- Game State ---
 game_state = {}
 
@@ -74,40 +40,40 @@ def spawn_pipe(x_pos):
     gap_y = random.randint(10, SCREEN_HEIGHT - 10 - PIPE_GAP_SIZE)
     game_state["pipes"].append({'x': x_pos, 'gap_y': gap_y, 'scored': False})
 
-def draw_player(oled, upside_down):
+def draw_player(cv):
     y = int(game_state["player_y"]) - (PLAYER_HEIGHT // 2)
     # Body
-    _draw_rect_filled(oled, PLAYER_X, y, PLAYER_WIDTH, PLAYER_HEIGHT, 1, upside_down)
+    cv.fill_rect(PLAYER_X, y, PLAYER_WIDTH, PLAYER_HEIGHT, 1)
     # Eye (simple animation)
     eye_y = y + 3
     eye_x = PLAYER_X + PLAYER_WIDTH - 3
     if game_state["player_vy"] > 0.5: # Looking down when falling
         eye_y += 2
-    _draw_pixel(oled, eye_x, eye_y, 0, upside_down)
+    cv.pixel(eye_x, eye_y, 0)
 
-def draw_pipes(oled, upside_down):
+def draw_pipes(cv):
     for pipe in game_state["pipes"]:
         x = int(pipe['x'])
         # Top pipe
-        _draw_rect_filled(oled, x, 0, PIPE_WIDTH, pipe['gap_y'], 1, upside_down)
-        _draw_rounded_rect(oled, x - 2, pipe['gap_y'] - 4, PIPE_WIDTH + 4, 4, 1, 1, upside_down)
+        cv.fill_rect(x, 0, PIPE_WIDTH, pipe['gap_y'], 1)
+        cv.rounded_rect(x - 2, pipe['gap_y'] - 4, PIPE_WIDTH + 4, 4, 1, 1)
         # Bottom pipe
         bottom_pipe_y = pipe['gap_y'] + PIPE_GAP_SIZE
-        _draw_rect_filled(oled, x, bottom_pipe_y, PIPE_WIDTH, SCREEN_HEIGHT - bottom_pipe_y, 1, upside_down)
-        _draw_rounded_rect(oled, x - 2, bottom_pipe_y, PIPE_WIDTH + 4, 4, 1, 1, upside_down)
+        cv.fill_rect(x, bottom_pipe_y, PIPE_WIDTH, SCREEN_HEIGHT - bottom_pipe_y, 1)
+        cv.rounded_rect(x - 2, bottom_pipe_y, PIPE_WIDTH + 4, 4, 1, 1)
 
-def draw_game(oled, upside_down):
-    oled.fill(0)
+def draw_game(cv):
+    cv.clear()
     if game_state["game_over"]:
-        _text(oled, "Game Over", 32, 20, upside_down)
-        _text(oled, f"Score: {game_state['score']}", 36, 32, upside_down)
-        oled.show()
+        cv.text("Game Over", 32, 20)
+        cv.text(f"Score: {game_state['score']}", 36, 32)
+        cv.show()
         return
 
-    draw_pipes(oled, upside_down)
-    draw_player(oled, upside_down)
-    _text(oled, str(game_state["score"]), SCREEN_WIDTH // 2 - 4, 4, upside_down)
-    oled.show()
+    draw_pipes(cv)
+    draw_player(cv)
+    cv.text(str(game_state["score"]), SCREEN_WIDTH // 2 - 4, 4)
+    cv.show()
 
 def update_game(flap_button):
     if game_state["game_over"]: return
@@ -150,10 +116,11 @@ def run(env):
     flap_button = env.get("ok_button"); menu_button = env.get("menu_button")
 
     if not all([oled, flap_button, menu_button]): print("Missing required hardware"); return
+    cv = Canvas(oled, upside_down)
 
     while True:
         init_game()
-        oled.fill(0); _text(oled, "Flappy", 40, 20, upside_down); _text(oled, "Press OK", 32, 40, upside_down); oled.show()
+        cv.clear(); cv.text("Flappy", 40, 20); cv.text("Press OK", 32, 40); cv.show()
         while flap_button.value() == 1:
             if menu_button.value() == 0: sleep_ms(500); return
             sleep_ms(50)
@@ -167,12 +134,12 @@ def run(env):
             last_frame_time = now
 
             update_game(flap_button)
-            draw_game(oled, upside_down)
+            draw_game(cv)
 
-        draw_game(oled, upside_down)
+        draw_game(cv)
         sleep_ms(1000)
         
-        _text(oled, "Press OK", 32, 45, upside_down); oled.show()
+        cv.text("Press OK", 32, 45); cv.show()
         while flap_button.value() == 1:
             if menu_button.value() == 0: sleep_ms(500); return
             sleep_ms(50)
\ No newline at end of file
@@ -3,11 +3,13 @@
 
 import random
 from time import sleep_ms, ticks_ms, ticks_diff
-from oled_functions import _text, DEFAULT_UPSIDE
+from oled_functions import DEFAULT_UPSIDE
+from canvas import Canvas
 from buzzer_sounds import play_tone
 
 # --- Game Constants ---
 SCREEN_WIDTH, SCREEN_HEIGHT = 128, 48 # Changed to 128x48 resolution
+FIELD_Y = 64 - SCREEN_HEIGHT # Playfield sits below the score line
 GRID_SIZE = 8 # Each cell is 8x8 pixels
 GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
 GRID_HEIGHT = SCREEN_HEIGHT // GRID_SIZE # Will be 48 // 8 = 6
@@ -24,49 +26,6 @@ DOWN = (0, 1)
 LEFT = (-1, 0)
 RIGHT = (1, 0)
 
-# --- Drawing Helpers (to handle upside_down) ---
-def _draw_pixel(oled, x, y, c, upside_down):
-    if upside_down:
-        oled.pixel(SCREEN_WIDTH - 1 - x, SCREEN_HEIGHT - 1 - y, c)
-    else:
-        oled.pixel(x, y, c)
-
-def _draw_hline(oled, x, y, w, c, upside_down):
-    if upside_down:
-        oled.hline(SCREEN_WIDTH - x - w, SCREEN_HEIGHT - 1 - y, w, c)
-    else:
-        oled.hline(x, y, w, c)
-
-def _draw_vline(oled, x, y, h, c, upside_down):
-    if upside_down:
-        oled.vline(SCREEN_WIDTH - 1 - x, SCREEN_HEIGHT - y - h, h, c)
-    else:
-        oled.vline(x, y, h, c)
-
-def _draw_rect_filled(oled, x, y, w, h, c, upside_down):
-    if upside_down:
-        oled.fill_rect(SCREEN_WIDTH - x - w, SCREEN_HEIGHT - y - h, w, h, c)
-    else:
-        oled.fill_rect(x, y, w, h, c)
-
-def _draw_rect_outline(oled, x, y, w, h, c, upside_down):
-    _draw_hline(oled, x, y, w, c, upside_down)
-    _draw_hline(oled, x, y + h - 1, w, c, upside_down)
-    _draw_vline(oled, x, y, h, c, upside_down)
-    _draw_vline(oled, x + w - 1, y, h, c, upside_down)
-
-def _draw_rounded_rect(oled, x, y, w, h, r, c, upside_down):
-    """Draws a rounded rectangle. r is the corner radius."""
-    _draw_hline(oled, x + r, y, w - 2 * r, c, upside_down) # Top
-    _draw_hline(oled, x + r, y + h - 1, w - 2 * r, c, upside_down) # Bottom
-    _draw_vline(oled, x, y + r, h - 2 * r, c, upside_down) # Left
-    _draw_vline(oled, x + w - 1, y + r, h - 2 * r, c, upside_down) # Right
-    # Corners
-    _draw_pixel(oled, x + r - 1, y + r - 1, c, upside_down)
-    _draw_pixel(oled, x + w - r, y + r - 1, c, upside_down)
-    _draw_pixel(oled, x + r - 1, y + h - r, c, upside_down)
-    _draw_pixel(oled, x + w - r, y + h - r, c, upside_down)
-
 # --- Game State ---
 game_state = {}
 
@@ -98,25 +57,25 @@ def spawn_food():
             game_state["food_pos"] = (x, y)
             break
 
-def draw_game(oled, upside_down):
-    oled.fill(0)
+def draw_game(cv):
+    cv.clear()
     if game_state["game_over"]:
-        _text(oled, "Game Over", 32, 20, upside_down)
-        _text(oled, f"Score: {game_state['score']}", 36, 32, upside_down)
-        oled.show()
+        cv.text("Game Over", 32, 20)
+        cv.text(f"Score: {game_state['score']}", 36, 32)
+        cv.show()
         return
 
     # Draw snake
     for segment_x, segment_y in game_state["snake"]:
-        _draw_rounded_rect(oled, segment_x * GRID_SIZE, segment_y * GRID_SIZE, GRID_SIZE, GRID_SIZE, 2, 1, upside_down)
+        cv.rounded_rect(segment_x * GRID_SIZE, FIELD_Y + segment_y * GRID_SIZE, GRID_SIZE, GRID_SIZE, 2, 1)
 
     # Draw food
     food_x, food_y = game_state["food_pos"]
-    _draw_rect_outline(oled, food_x * GRID_SIZE, food_y * GRID_SIZE, GRID_SIZE, GRID_SIZE, 1, upside_down)
+    cv.rect(food_x * GRID_SIZE, FIELD_Y + food_y * GRID_SIZE, GRID_SIZE, GRID_SIZE, 1)
 
     # Draw score
-    _text(oled, f"Score: {game_state['score']}", 0, 0, upside_down)
-    oled.show()
+    cv.text(f"Score: {game_state['score']}", 0, 0)
+    cv.show()
 
 def update_game(menu_button, ok_button):
     if game_state["game_over"]: return
@@ -189,22 +148,23 @@ def run(env):
     menu_button = env.get("menu_button"); ok_button = env.get("ok_button")
 
     if not all([oled, menu_button, ok_button]): print("Missing required hardware"); return
+    cv = Canvas(oled, upside_down)
 
     while True:
         init_game()
         # Show start screen
-        oled.fill(0)
-        _text(oled, "Snake", 40, 20, upside_down)
-        _text(oled, "Menu:Left, OK:Right", 0, 32, upside_down)
-        _text(oled, "Press OK to Start", 0, 40, upside_down)
-        oled.show()
+        cv.clear()
+        cv.text("Snake", 40, 20)
+        cv.text("Menu:Left, OK:Right", 0, 32)
+        cv.text("Press OK to Start", 0, 40)
+        cv.show()
         while ok_button.value() == 1:
             # Check for hold both to exit during start screen
             if menu_button.value() == 0 and ok_button.value() == 0:
                 t0 = ticks_ms()
                 while menu_button.value() == 0 and ok_button.value() == 0:
                     if ticks_diff(ticks_ms(), t0) > 1000: 
-                        _text(oled, "Exiting...", 32, 28, upside_down); oled.show(); sleep_ms(500); return
+                        cv.text("Exiting...", 32, 28); cv.show(); sleep_ms(500); return
                     sleep_ms(20)
             sleep_ms(50)
         
@@ -216,7 +176,7 @@ def run(env):
                 t0 = ticks_ms()
                 while menu_button.value() == 0 and ok_button.value() == 0:
                     if ticks_diff(ticks_ms(), t0) > 1000: 
-                        _text(oled, "Exiting...", 32, 28, upside_down); oled.show(); sleep_ms(500); return
+                        cv.text("Exiting...", 32, 28); cv.show(); sleep_ms(500); return
                     sleep_ms(20)
 
             now = ticks_ms()
@@ -225,18 +185,18 @@ def run(env):
             last_frame_time = now
 
             update_game(menu_button, ok_button)
-            draw_game(oled, upside_down)
+            draw_game(cv)
 
-        draw_game(oled, upside_down)
+        draw_game(cv)
         sleep_ms(1000)
         
-        _text(oled, "Press OK", 32, 45, upside_down); oled.show()
+        cv.text("Press OK", 32, 45); cv.show()
         while ok_button.value() == 1:
             # Check for hold both to exit during game over screen
             if menu_button.value() == 0 and ok_button.value() == 0:
                 t0 = ticks_ms()
                 while menu_button.value() == 0 and ok_button.value() == 0:
                     if ticks_diff(ticks_ms(), t0) > 1000: 
-                        _text(oled, "Exiting...", 32, 28, upside_down); oled.show(); sleep_ms(500); return
+                        cv.text("Exiting...", 32, 28); cv.show(); sleep_ms(500); return
                     sleep_ms(20)
             sleep_ms(50)
\ No newline at end of file
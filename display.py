@@ -0,0 +1,218 @@
+# SSD1306 display wrapper
+# Extends the stock ssd1306 driver with:
+# - hardware orientation, so drawing code can always use normal coordinates
+#   and the 180 degree flip costs nothing per frame
+# - dirty-page refresh: show() keeps a shadow of the last frame sent and only
+#   pushes the changed column span of each changed page over I2C
+# - optional double buffering: show() hands the frame to a front buffer and
+#   returns; a timer sends it one page per tick so the I2C bus is never held
+#   for a whole frame
+
+import ssd1306
+from machine import Timer
+
+# SSD1306 commands (see datasheet section 10.1)
+SET_SEG_REMAP = 0xA0     # | 1 -> column 127 mapped to SEG0
+SET_COM_OUT_DIR = 0xC0   # | 0x08 -> scan from COM[N-1] to COM0
+SET_COL_ADDR = 0x21
+SET_PAGE_ADDR = 0x22
+
+# Double buffering
+FLUSH_TIMER_ID = 0
+FLUSH_PERIOD_MS = 4      # A full 128 byte page takes ~3 ms at 400 kHz
+
+class Display(ssd1306.SSD1306_I2C):
+    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False):
+        self.hw_upside_down = False
+        self._shadow = None       # Copy of what the panel shows, None until the first full refresh
+        self._force_full = True
+        # Narrow panels are centred in the controller's 128 columns
+        self._col_offset = (128 - width) // 2
+        # Double buffering state (see enable_double_buffer)
+        self._front = None
+        self._pending = 0         # Bitmask of pages the flusher still has to check
+        self._full_pages = 0      # Bitmask of pages to send whole
+        self._next_page = 0
+        self._timer = None
+        self._flushing = False
+        super().__init__(width, height, i2c, addr, external_vcc)
+
+    def invalidate(self):
+        """Make the next show() resend the whole frame"""
+        self._force_full = True
+
+    def show(self, src=None):
+        """Send only what changed since the last show()
+
+        src, a memoryview laid out like self.buffer (e.g. a frame that
+        canvas.Canvas rotated in software), is sent instead of the drawing
+        buffer.
+        """
+        if self._shadow is None:
+            # First frame, sent by the driver's init_display()
+            super().show()
+            self._shadow = bytearray(self.buffer)
+            self._shadow_mv = memoryview(self._shadow)
+            self._buffer_mv = memoryview(self.buffer)
+            self._force_full = False
+            if src is None:
+                return
+        if self._front is not None:
+            self.present(src)
+            return
+        if src is None:
+            src = self._buffer_mv
+        full = self._force_full
+        self._force_full = False
+        for page in range(self.pages):
+            self._flush_page(src, page, full)
+
+    def _flush_page(self, src, page, full=False):
+        """Send the changed span of one page of src; returns True if anything was sent"""
+        width = self.width
+        start = page * width
+        end = start + width
+        if full:
+            first = start
+            last = end - 1
+        else:
+            shadow = self._shadow
+            if src[start:end] == self._shadow_mv[start:end]:
+                return False
+            # Narrow the transfer to the changed column span of this page
+            first = start
+            while src[first] == shadow[first]:
+                first += 1
+            last = end - 1
+            while src[last] == shadow[last]:
+                last -= 1
+        self.write_cmd(SET_COL_ADDR)
+        self.write_cmd(first - start + self._col_offset)
+        self.write_cmd(last - start + self._col_offset)
+        self.write_cmd(SET_PAGE_ADDR)
+        self.write_cmd(page)
+        self.write_cmd(page)
+        span = src[first:last + 1]
+        self.write_data(span)
+        self._shadow_mv[first:last + 1] = span
+        return True
+
+    # --- Double buffering ---
+    def enable_double_buffer(self, timer_id=FLUSH_TIMER_ID):
+        """Make show() non-blocking. Returns False if no timer is available"""
+        if self._front is not None:
+            return True
+        try:
+            self._timer = Timer(timer_id)
+        except (ValueError, OSError):
+            return False
+        self._front = bytearray(len(self.buffer))
+        self._front_mv = memoryview(self._front)
+        return True
+
+    def present(self, src=None):
+        """Swap the drawn frame (or src, see show()) to the front buffer and start sending it"""
+        if self._front is None:
+            self.show(src)
+            return
+        self._front_mv[:] = self._buffer_mv if src is None else src
+        all_pages = (1 << self.pages) - 1
+        if self._force_full:
+            self._full_pages = all_pages
+            self._force_full = False
+        # The flusher keeps its round-robin position so no page starves
+        self._pending = all_pages
+        # ESP32 timer callbacks are soft IRQs, so I2C is allowed in them
+        self._resume_flush()
+
+    def _on_timer(self, _timer):
+        if not self._flushing:
+            return  # Scheduled just before _pause_flush() stopped the timer
+        try:
+            more = self.step()
+        except OSError:
+            # Bus error: drop this frame and resend everything with the next one
+            self._pending = 0
+            self._force_full = True
+            more = False
+        if not more:
+            self._timer.deinit()
+            self._flushing = False
+
+    def step(self):
+        """Send the next changed page of the front buffer; returns False when idle"""
+        while self._pending:
+            page = self._next_page
+            self._next_page = (page + 1) % self.pages
+            bit = 1 << page
+            if not self._pending & bit:
+                continue
+            self._pending &= ~bit
+            full = self._full_pages & bit
+            self._full_pages &= ~bit
+            if self._flush_page(self._front_mv, page, full):
+                return True
+        return False
+
+    def busy(self):
+        return self._pending != 0
+
+    def flush(self):
+        """Block until the presented frame is fully on the panel"""
+        self._pause_flush()
+        while self.step():
+            pass
+
+    # --- Commands ---
+    # The flush timer's soft IRQ can run between any two write_cmd() calls of
+    # the main thread, and a page it sends in between would split a
+    # multi-byte command (or change the address window mid-sequence). So
+    # the timer is stopped while commands go out, and restarted afterwards
+    # if pages are still pending.
+    def _pause_flush(self):
+        if self._flushing:
+            self._timer.deinit()
+            self._flushing = False
+
+    def _resume_flush(self):
+        if self._pending and not self._flushing:
+            self._flushing = True
+            self._timer.init(period=FLUSH_PERIOD_MS, mode=Timer.PERIODIC, callback=self._on_timer)
+
+    def _command(self, method, *args):
+        self._pause_flush()
+        try:
+            method(self, *args)
+        finally:
+            self._resume_flush()
+
+    def poweroff(self):
+        self._command(ssd1306.SSD1306_I2C.poweroff)
+
+    def poweron(self):
+        self._command(ssd1306.SSD1306_I2C.poweron)
+
+    def contrast(self, contrast):
+        self._command(ssd1306.SSD1306_I2C.contrast, contrast)
+
+    def invert(self, invert):
+        self._command(ssd1306.SSD1306_I2C.invert, invert)
+
+    def set_upside_down(self, upside_down):
+        """Rotate the panel 180 degrees in the controller. Returns True on success"""
+        # The driver's init uses remapped segments and reversed COM scan;
+        # clearing both mirrors the image horizontally and vertically.
+        remap = 0 if upside_down else 1
+        self._pause_flush()
+        try:
+            self.write_cmd(SET_SEG_REMAP | remap)
+            self.write_cmd(SET_COM_OUT_DIR | (remap << 3))
+            # Segment remap only applies to new data, so resend the frame
+            self.invalidate()
+            self.show()
+        except OSError:
+            return False
+        finally:
+            self._resume_flush()
+        self.hw_upside_down = bool(upside_down)
+        return True
@@ -0,0 +1,302 @@
+# Gesture recognition over blocks of accelerometer samples
+# Each block (the x, y, z triples drained from the ADXL345 FIFO) is reduced
+# in one pass to a few integer features: peak movement, energy, zero
+# crossings and dominant axis. A lookup table turns the movement level and
+# oscillation into a gesture class, and short run counters turn classes into
+# events (stroll, shake, rough, headpat, pickup, ...) that main.py reacts to.
+# Everything is integer maths on preallocated state.
+
+from rolling_window import RollingWindow
+from ADXL345 import ADXL345
+
+# Events
+STILL = 1      # Movement stopped
+STROLL = 2     # Carried around gently for a while
+SHAKE = 3      # Shaken back and forth
+ROUGH = 4      # Hard jolt or rough handling
+HEADPAT = 5    # Double tap, or gentle rhythmic bumps from above
+PICKUP = 6     # Lifted up after lying still
+FALL = 7       # Free fall
+NAMES = (None, "still", "stroll", "shake", "rough", "headpat", "pickup", "fall")
+
+# Movement force is an integer in signed raw units: 256 = 1g (±8g, full resolution)
+HISTORY_SIZE = 10
+GENTLE_MOVEMENT_MIN = 15 # Min threshold to be considered gentle movement (filters noise)
+GENTLE_MOVEMENT_MAX = 300 # Max threshold to be considered gentle movement
+ROUGH_MOVEMENT = 600
+
+# Adaptive noise / stillness parameters
+NOISE_ALPHA_DIV = 50            # EMA smoothing factor for noise floor (alpha = 1/50)
+BASELINE_NOISE_START = 6        # Initial guess of sensor jitter
+NOISE_WINDOW = 10               # Only forces this close to the baseline update it
+ACTIVE_MARGIN = 8               # Force above baseline to count as "active" sample
+GENTLE_ACTIVE_MIN_SAMPLES = 2   # Minimum active samples in history window
+STILL_RANGE_THRESHOLD = 10      # If (max-min) below this AND low active samples, treat as still
+
+# Oscillation
+ZC_HYSTERESIS = 12              # Swing past the gravity estimate needed to count a crossing
+CROSSING_WINDOW = 20            # Blocks the crossing count is kept over (~1 s)
+OSCILLATING_CROSSINGS = 4       # Crossings on the dominant axis over that window
+SHAKE_MIN_ENERGY = 150 * 150    # Mean squared swing of an oscillation that is a shake
+GRAVITY_SHIFT = 3               # Gravity estimate follows block means with alpha = 1/8
+PAT_MAX_ENERGY = 40 * 40        # Mean squared swing above this is too strong for a pat
+
+# Levels and classes
+LEVEL_STILL, LEVEL_GENTLE, LEVEL_MOVING, LEVEL_ROUGH = 0, 1, 2, 3
+C_STILL, C_GENTLE, C_PAT, C_MOVING, C_ROUGH, C_SHAKE = 0, 1, 2, 3, 4, 5
+# Oscillation bins: steady, oscillating, oscillating with shake energy
+OSC_STEADY, OSC_LIGHT, OSC_STRONG = 0, 1, 2
+# CLASS_TABLE[level * 3 + oscillation bin]
+CLASS_TABLE = bytes((
+    C_STILL, C_STILL, C_STILL,
+    C_GENTLE, C_PAT, C_SHAKE,
+    C_MOVING, C_MOVING, C_SHAKE,
+    C_ROUGH, C_SHAKE, C_SHAKE,
+))
+# Ticks of a class before its event fires: gentle -> STROLL, pat -> HEADPAT,
+# rough/shake -> SHAKE (0 = no event)
+RUN_TICKS = bytes((0, 15, 10, 0, 4, 2))
+PICKUP_STILL_TICKS = 20         # Still this long before a lift counts as a pickup
+
+EVENT_QUEUE_SIZE = 8
+
+def isqrt(n):
+    """Integer square root (floor) for 0 <= n < 2**30, without floats"""
+    root = 0
+    bit = 1 << 28
+    while bit > n:
+        bit >>= 2
+    while bit:
+        if n >= root + bit:
+            n -= root + bit
+            root = (root >> 1) + bit
+        else:
+            root >>= 1
+        bit >>= 2
+    return root
+
+class GestureEngine:
+    def __init__(self):
+        # History sums are compared instead of averages, so scale those limits once
+        self._gentle_sum_min = GENTLE_MOVEMENT_MIN * HISTORY_SIZE
+        self._gentle_sum_max = GENTLE_MOVEMENT_MAX * HISTORY_SIZE
+        self._rough_sum = ROUGH_MOVEMENT * HISTORY_SIZE
+        self.history = RollingWindow(HISTORY_SIZE, 0)
+        self.crossings = RollingWindow(CROSSING_WINDOW, 0)
+        self.baseline_q8 = BASELINE_NOISE_START << 8  # Q8 fixed point (256 = 1 raw unit)
+        self._queue = bytearray(EVENT_QUEUE_SIZE)
+        self._q_head = 0
+        self._q_tail = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the motion in progress (after the menu, or when waking from idle)"""
+        self._anchor = None      # Last sample of the previous block
+        self._gravity = None     # Per-axis gravity estimate
+        self._signs = [0, 0, 0]  # Side of the gravity estimate each axis is on
+        self._class = C_STILL
+        self._gentle_run = 0
+        self._pat_run = 0
+        self._rough_run = 0
+        self._still_ticks = 0
+        # Features of the last block, for debugging
+        self.force = 0
+        self.energy = 0
+        self.axis = 2
+        self.level = LEVEL_STILL
+
+    # --- Event queue ---
+    def _emit(self, event):
+        nxt = (self._q_head + 1) % EVENT_QUEUE_SIZE
+        if nxt != self._q_tail:
+            self._queue[self._q_head] = event
+            self._q_head = nxt
+
+    def pop(self):
+        """Next gesture event, 0 if none"""
+        if self._q_tail == self._q_head:
+            return 0
+        event = self._queue[self._q_tail]
+        self._q_tail = (self._q_tail + 1) % EVENT_QUEUE_SIZE
+        return event
+
+    def feed_interrupts(self, bits):
+        """Turn ADXL345 interrupt flags into events"""
+        if bits & ADXL345.INT_FREE_FALL:
+            self._emit(FALL)
+        elif bits & ADXL345.INT_DOUBLE_TAP:
+            self._emit(HEADPAT)
+
+    # --- Sample blocks ---
+    def feed(self, samples):
+        """Process a block of x, y, z triples (signed raw units), oldest first"""
+        count = len(samples)
+        if count < 3:
+            return
+        if self._anchor is None:
+            self._anchor = (samples[0], samples[1], samples[2])
+        if self._gravity is None:
+            self._gravity = [samples[0], samples[1], samples[2]]
+        px, py, pz = self._anchor
+        gx, gy, gz = self._gravity
+        signs = self._signs
+        sx, sy, sz = signs
+        hyst = ZC_HYSTERESIS
+
+        # One pass: peak distance from the previous block's last sample,
+        # swing around gravity (energy, per-axis sums, crossings)
+        peak = 0
+        energy = 0
+        abs_x = abs_y = abs_z = 0
+        cross_x = cross_y = cross_z = 0
+        sum_x = sum_y = sum_z = 0
+        for i in range(0, count, 3):
+            x = samples[i]
+            y = samples[i + 1]
+            z = samples[i + 2]
+            sum_x += x
+            sum_y += y
+            sum_z += z
+            d = x - px
+            d2 = d * d
+            d = y - py
+            d2 += d * d
+            d = z - pz
+            d2 += d * d
+            if d2 > peak:
+                peak = d2
+            hx = x - gx
+            hy = y - gy
+            hz = z - gz
+            # Pre-scaled by 1/32 so a full block of ±8g swings stays a small int
+            energy += (hx * hx + hy * hy + hz * hz) >> 5
+            if hx > hyst:
+                abs_x += hx
+                if sx < 0:
+                    cross_x += 1
+                sx = 1
+            elif hx < -hyst:
+                abs_x -= hx
+                if sx > 0:
+                    cross_x += 1
+                sx = -1
+            if hy > hyst:
+                abs_y += hy
+                if sy < 0:
+                    cross_y += 1
+                sy = 1
+            elif hy < -hyst:
+                abs_y -= hy
+                if sy > 0:
+                    cross_y += 1
+                sy = -1
+            if hz > hyst:
+                abs_z += hz
+                if sz < 0:
+                    cross_z += 1
+                sz = 1
+            elif hz < -hyst:
+                abs_z -= hz
+                if sz > 0:
+                    cross_z += 1
+                sz = -1
+        n = count // 3
+        signs[0] = sx
+        signs[1] = sy
+        signs[2] = sz
+        self._anchor = (samples[count - 3], samples[count - 2], samples[count - 1])
+        g = self._gravity
+        g[0] = gx + ((sum_x // n - gx) >> GRAVITY_SHIFT)
+        g[1] = gy + ((sum_y // n - gy) >> GRAVITY_SHIFT)
+        g[2] = gz + ((sum_z // n - gz) >> GRAVITY_SHIFT)
+
+        # Dominant axis: the one that swung the most
+        if abs_x >= abs_y and abs_x >= abs_z:
+            axis, crossings = 0, cross_x
+        elif abs_y >= abs_z:
+            axis, crossings = 1, cross_y
+        else:
+            axis, crossings = 2, cross_z
+        force = isqrt(peak)
+        self.force = force
+        self.energy = (energy // n) << 5
+        self.axis = axis
+        self._tick(force, crossings, axis == self._vertical_axis())
+
+    def _vertical_axis(self):
+        g = self._gravity
+        ax, ay, az = abs(g[0]), abs(g[1]), abs(g[2])
+        if ax >= ay and ax >= az:
+            return 0
+        return 1 if ay >= az else 2
+
+    def _tick(self, force, crossings, vertical):
+        history = self.history
+        # Add the new force to the history, judged against the current noise floor
+        history.push(force, force > (self.baseline_q8 >> 8) + ACTIVE_MARGIN)
+        self.crossings.push(crossings)
+        # Only forces close to the noise floor update it
+        if (force << 8) < self.baseline_q8 + (NOISE_WINDOW << 8):
+            self.baseline_q8 += ((force << 8) - self.baseline_q8) // NOISE_ALPHA_DIV
+
+        total = history.total
+        is_still = ((history.range() < STILL_RANGE_THRESHOLD and history.active < GENTLE_ACTIVE_MIN_SAMPLES)
+                    or (total << 8) <= (self.baseline_q8 + (ACTIVE_MARGIN << 8)) * HISTORY_SIZE)
+        if total <= self._gentle_sum_min or is_still:
+            level = LEVEL_STILL
+        elif total <= self._gentle_sum_max:
+            level = LEVEL_GENTLE
+        elif total < self._rough_sum:
+            level = LEVEL_MOVING
+        else:
+            level = LEVEL_ROUGH
+        self.level = level
+        if self.crossings.total < OSCILLATING_CROSSINGS:
+            osc = OSC_STEADY
+        elif self.energy < SHAKE_MIN_ENERGY:
+            osc = OSC_LIGHT
+        else:
+            osc = OSC_STRONG
+        cls = CLASS_TABLE[level * 3 + osc]
+        if cls == C_PAT and not (vertical and self.energy <= PAT_MAX_ENERGY):
+            cls = C_GENTLE
+
+        if cls != C_STILL:
+            # A vertical lift straight out of stillness is being picked up
+            if osc == OSC_STEADY and vertical and self._still_ticks >= PICKUP_STILL_TICKS:
+                self._emit(PICKUP)
+
+        if cls == C_STILL:
+            if self._class != C_STILL:
+                self._emit(STILL)
+            self._still_ticks += 1
+            self._gentle_run = 0
+            self._pat_run = 0
+            self._rough_run = 0
+        elif cls == C_MOVING:
+            # In between: keeps the runs going, like a pause in a stroll
+            self._still_ticks = 0
+        elif cls <= C_PAT:
+            self._still_ticks = 0
+            self._rough_run = 0
+            self._gentle_run += 1
+            if self._gentle_run >= RUN_TICKS[C_GENTLE]:
+                self._emit(STROLL)
+                self._gentle_run = 0
+            if cls == C_PAT:
+                self._pat_run += 1
+            if self._pat_run >= RUN_TICKS[C_PAT]:
+                self._emit(HEADPAT)
+                self._pat_run = 0
+        else:
+            if level == LEVEL_ROUGH:
+                self._emit(ROUGH)
+            self._still_ticks = 0
+            self._gentle_run = 0
+            self._pat_run = 0
+            # Shaking back and forth gets dizzy sooner than rough handling
+            self._rough_run += 1
+            if self._rough_run >= RUN_TICKS[cls]:
+                self._emit(SHAKE)
+                self._rough_run = 0
+        self._class = cls
@@ -8,18 +8,20 @@ SET_DEBUG = False  # Will be set to True automatically if hardware fails
 
 from ADXL345 import ADXL345
 from machine import Pin, I2C
-from time import sleep_ms
-from buzzer_sounds import (
-    startup_shush, startup_sequence, happy_sound,
-    angry_sound, shook_sound, headpat_sound, curious_scared_sound
-)
-from happy_meter import meter as get_happy
+from time import sleep_ms, ticks_ms, ticks_diff
+from buzzer_sounds import startup_shush, startup_sequence, play_async
 from menu import open_menu
-from pin_values import code_debug_pin_value
-import ssd1306
+from pin_values import code_debug_pin_value, accel_int_pin_value
+import display
 import oled_functions
-from collections import deque
-import math
+import gestures
+import sensor_trace
+import calibration
+from mood import Mood
+from sensor_service import SensorService
+from async_queue import Queue
+from array import array
+import uasyncio as asyncio
 
 import network
 
@@ -33,7 +35,7 @@ import network
 def safe_oled_update(display_type, value=None):
     """Safely update OLED - skip if OLED is not available"""
     if oled is not None:
-        oled_functions.update_oled(oled, display_type, value, UPSIDE_DOWN, SET_DEBUG)
+        return oled_functions.update_oled(oled, display_type, value, UPSIDE_DOWN, SET_DEBUG)
     elif SET_DEBUG:
         if value is not None:
             print(f"🖥️ OLED: {display_type} = {value}")
@@ -49,7 +51,7 @@ sleep_ms(100)  # Wait for I2C bus to settle
 # Try to initialize OLED - enable debug mode if it fails
 oled = None
 try:
-    oled = ssd1306.SSD1306_I2C(128, 64, i2c_bus)
+    oled = display.Display(128, 64, i2c_bus)
     print("✅ OLED initialized successfully")
 except OSError as e:
     SET_DEBUG = True  # Enable debug mode on failure
@@ -60,6 +62,15 @@ except OSError as e:
 # === DISPLAY SETTINGS ===
 UPSIDE_DOWN = True  # Set to True to flip the display 180 degrees
 
+# Let the controller do the flip when it can, then draw in normal coordinates
+if oled is not None and oled.set_upside_down(UPSIDE_DOWN or oled_functions.DEFAULT_UPSIDE):
+    UPSIDE_DOWN = False
+    oled_functions.set_face_orientations((False,))
+
+# Send frames page by page from a timer so show() never stalls the loop
+if oled is not None and not oled.enable_double_buffer():
+    print("⚠️ No timer for display flushing, using blocking refresh")
+
 # === FIRST BOOT CHECK ===
 if not settings_store._settings.get('setup_completed', False):
     import first_boot
@@ -79,46 +90,69 @@ except Exception as e:
     class BasicDummy:
         def read_accel_data(self):
             return (0, 0, 1000)
+        def read_accel_into(self, out):
+            out[0], out[1], out[2] = 0, 0, 1000
+            return out
         def read_accel_abs(self):
             return 1000.0
         def is_shaking(self):
             return False
+        def enable_fifo(self, watermark=16):
+            return False
+        def read_fifo(self):
+            return memoryview(array('h', (0, 0, 1000)))
+        def enable_events(self, int_pin=None, **kwargs):
+            return False
+        def pop_event(self):
+            return 0
+        def set_offsets(self, x, y, z):
+            pass
+        rate_hz = 400
+        profile = ADXL345.PROFILE_ACTIVE
+        def set_data_rate(self, hz, low_power=False):
+            pass
+        def set_profile(self, name):
+            self.profile = name
+        def event_pending(self):
+            return False
     mpu = BasicDummy()
 
+# Trim the zero-g error saved by menu > Calibrate Sensor
+calibration.apply(mpu)
+
+# The one owner of the sensor: queues every sample it takes in a ring that
+# the loop and the apps read through their own subscriptions
+sensors = SensorService(mpu)
+motion = sensors.subscribe()
+# Let the sensor spot taps, falls and stillness itself
+mpu.enable_events(accel_int_pin_value)
+
 debug_button = Pin(code_debug_pin_value, Pin.IN, Pin.PULL_UP)
 
-# === DISPLAY SETTINGS ===
-UPSIDE_DOWN = True  # Set to True to flip the display 180 degrees
+# === EMOTIONAL STATE ===
+# Happiness, trust and the reaction face (see mood.py)
+mood = Mood()
 
-# === EMOTIONAL STATE COUNTERS ===
-happy_level = 50
-movement_count = 0
-shake_count = 0
-headpat_count = 0
-gentle_movement_count = 0
-
-# === ROLLING AVERAGE FOR MOVEMENT DETECTION ===
-# Use a deque to store recent movement force values
-MOVEMENT_HISTORY_SIZE = 10
-movement_history = deque([0] * MOVEMENT_HISTORY_SIZE, MOVEMENT_HISTORY_SIZE)
-
-# === Constants ===
-HEADPAT_THRESHOLD = 4
-SHAKE_THRESHOLD = 7
-MOVEMENT_SENSITIVITY = 2
-GENTLE_MOVEMENT_THRESHOLD = 15 # How long gentle movement is needed for a reward
-# Adjusted thresholds for the new rolling average method
-GENTLE_MOVEMENT_MIN = 1000 # Min threshold to be considered gentle movement (filters noise)
-GENTLE_MOVEMENT_MAX = 35000 # Max threshold to be considered gentle movement
-ROUGH_MOVEMENT = 80000
-
-# --- New adaptive noise / stillness parameters ---
-NOISE_ALPHA = 0.02              # EMA smoothing factor for noise floor
-BASELINE_NOISE_START = 1500.0    # Initial guess of sensor jitter
-ACTIVE_MARGIN = 500              # Force above baseline to count as "active" sample (reduced from 800)
-GENTLE_ACTIVE_MIN_SAMPLES = 2    # Minimum active samples in history window (was 4)
-STILL_RANGE_THRESHOLD = 1200     # If (max-min) below this AND low active samples, treat as still (was 2500)
-baseline_noise = BASELINE_NOISE_START
+# --- Gestures ---
+# Turns sensor samples and interrupts into gesture events (see gestures.py)
+engine = gestures.GestureEngine()
+sensor_idle = False             # Set by the inactivity interrupt, cleared by activity
+
+# --- Task timing ---
+ACTIVE_LOOP_MS = 50             # Sensor period while moving (was a 150ms loop)
+IDLE_LOOP_MS = 250              # Longest sensor wait while lying still
+IDLE_POLL_MS = 20               # How often that wait checks for the activity interrupt
+BUTTON_POLL_MS = 50
+RENDER_MAX_MS = 1000            # Redraw at least this often, even if nothing changed
+SOUND_GAP_MS = 100              # Pause between sounds queued back to back
+
+# Sounds for each gesture; ROUGH depends on the mood (see mood_task)
+GESTURE_SOUNDS = {
+    gestures.SHAKE: ("shook_sound", "shook_sound"),
+    gestures.HEADPAT: ("headpat_sound",),
+    gestures.PICKUP: ("curious_scared_sound",),
+    gestures.FALL: ("curious_scared_sound",),
+}
 
 # === STARTUP/INTRO ===
 print("🤖 Sidekick Starting Up! (˶ᵔ ᵕ ᵔ˶)")
@@ -128,125 +162,160 @@ safe_oled_update("happy", 85)
 startup_sequence()
 print("🎮 Sidekick Ready! (っ´ω`)ﾉ")
 
-# Initialize previous_accel for difference calculation
-try:
-    previous_accel = mpu.read_accel_data()
-except Exception as e:
-    previous_accel = (0, 0, 0)
-    if SET_DEBUG:
-        print(f"⚠️ Initial accel read failed: {e}")
+# === TASKS ===
+# The pet runs as cooperating uasyncio tasks that talk through small queues:
+#   sensor -> gesture_q -> mood -> sound_q -> sound
+#                            \-> redraw -> render
+# The button task stops them all to hand the screen and buttons to the menu.
+# Queues and events are made fresh for every run of the scheduler (see pet).
+gesture_q = sound_q = redraw = None
 
-# === MAIN LOOP ===
-while True:
-    try:
-        # Build env reference for dynamic code each loop (lightweight)
-        env = {
-            'oled': oled,
-            'mpu': mpu,
-            'i2c': i2c_bus, # Add i2c bus to env
-            'open_menu': lambda : open_menu(oled, SET_DEBUG, UPSIDE_DOWN, True, env=env),
-        }
-        # Read accelerometer data and calculate movement force
+async def sensor_task():
+    global sensor_idle
+    while True:
         try:
-            current_accel = mpu.read_accel_data()
-            
-            # Calculate the difference from the previous reading
-            diff_x = current_accel[0] - previous_accel[0]
-            diff_y = current_accel[1] - previous_accel[1]
-            diff_z = current_accel[2] - previous_accel[2]
-            
-            # Calculate the magnitude of the difference vector
-            movement_force = math.sqrt(diff_x**2 + diff_y**2 + diff_z**2)
-            
-            # Update the previous acceleration value for the next iteration
-            previous_accel = current_accel
-            
-            # Add the new force to our history
-            movement_history.append(movement_force)
-            
-            if SET_DEBUG:
-                print(f"📊 IMU: accel={current_accel}, force={movement_force:.1f}")
+            # === Sensor interrupts ===
+            events = 0
+            ev = mpu.pop_event()
+            while ev:
+                events |= ev
+                ev = mpu.pop_event()
+            if events & ADXL345.INT_ACTIVITY:
+                # Moving again: full rate before the first block is read
+                sensors.set_profile(ADXL345.PROFILE_ACTIVE)
+                sensor_idle = False
+            elif events & ADXL345.INT_INACTIVITY:
+                sensor_idle = True
+                sensors.set_profile(ADXL345.PROFILE_IDLE)
+                engine.reset()
+            engine.feed_interrupts(events)
+
+            # Lying still: no samples to work through until the activity interrupt
+            if not sensor_idle:
+                try:
+                    # Every sample since the last pass, as x, y, z triples
+                    sensors.poll()
+                    samples = motion.read()
+                    sensor_trace.record(events, samples)
+                    engine.feed(samples)
+                    if SET_DEBUG:
+                        print(f"📊 IMU: force={engine.force} energy={engine.energy} axis={engine.axis} level={engine.level} base={engine.baseline_q8 >> 8} skipped_frames={oled_functions.skipped_frames}")
+                except Exception as e:
+                    if SET_DEBUG:
+                        print(f"💥 Accelerometer error: {e}")
+            elif events:
+                sensor_trace.record(events, ())
+
+            gesture = engine.pop()
+            while gesture:
+                gesture_q.put_nowait(gesture)
+                gesture = engine.pop()
+
+            if sensor_idle:
+                # Only the activity interrupt ends the wait early
+                start = ticks_ms()
+                while ticks_diff(ticks_ms(), start) < IDLE_LOOP_MS and not mpu.event_pending():
+                    await asyncio.sleep_ms(IDLE_POLL_MS)
+            else:
+                await asyncio.sleep_ms(ACTIVE_LOOP_MS)
         except Exception as e:
-            movement_force = 0
-            if SET_DEBUG:
-                print(f"💥 Accelerometer error: {e}")
-
-        # === Adaptive noise baseline update ===
-        # Only update baseline with very low movements close to current baseline
-        if movement_force < (baseline_noise + 600):  # narrower adaptive window
-            baseline_noise += NOISE_ALPHA * (movement_force - baseline_noise)
-
-        # Calculate the average movement force from the history
-        average_force = sum(movement_history) / MOVEMENT_HISTORY_SIZE
-        range_force = max(movement_history) - min(movement_history)
-        active_samples = sum(1 for f in movement_history if f > (baseline_noise + ACTIVE_MARGIN))
-
-        if SET_DEBUG:
-            print(f"🔎 avg={average_force:.0f} base={baseline_noise:.0f} rng={range_force:.0f} act={active_samples}")
-
-        # Shake reactions
-        if movement_count >= MOVEMENT_SENSITIVITY:
-            print("😵 I'm getting dizzy! (⸝⸝๑﹏๑⸝⸝)")
-            safe_oled_update("shake")
-            shook_sound()
-            sleep_ms(100)
-            shook_sound()
-            shake_count += 1
-            movement_count = 0
-            if shake_count >= SHAKE_THRESHOLD:
-                happy_level = 0
-                shake_count = 0
-                print("💔 All trust lost! I'm extremely dizzy and sad...")
-                sleep_ms(150)
-                safe_oled_update("happy", 10)
-            continue
-
-        # Movement logic based on refined criteria
-        is_still = ((range_force < STILL_RANGE_THRESHOLD and active_samples < GENTLE_ACTIVE_MIN_SAMPLES) or (average_force <= baseline_noise + ACTIVE_MARGIN))
-
-        if average_force <= GENTLE_MOVEMENT_MIN or is_still:
-            # Reset counters if movement stops or treated as still
-            movement_count = 0
-            gentle_movement_count = 0
-        elif GENTLE_MOVEMENT_MIN < average_force <= GENTLE_MOVEMENT_MAX:
-            # If movement is gentle and shows real variation, increment gentle counter
-            gentle_movement_count += 1
-            movement_count = 0 # Reset rough movement counter
+            print("Error in sensor task:", e)
+            await asyncio.sleep_ms(1000)
+
+async def mood_task():
+    while True:
+        gesture = await gesture_q.get()
+        try:
             if SET_DEBUG:
-                print(f"🌱 gentle_progress={gentle_movement_count}/{GENTLE_MOVEMENT_THRESHOLD}")
-            if gentle_movement_count >= GENTLE_MOVEMENT_THRESHOLD:
-                print("😊 This is a nice stroll! (´▽｀)")
-                happy_level = get_happy("add", happy_level, 0.1) # Gradual increase
-                gentle_movement_count = 0 # Reset after reward
-        elif average_force >= ROUGH_MOVEMENT:
-            # If movement is rough, increment rough counter
-            movement_count += 1
-            gentle_movement_count = 0 # Reset gentle counter
-            if happy_level < 75:
-                angry_sound()
-                print("😠 Hey! What was that for! ヽ(｀Д´)ﾉ")
+                print(f"👋 gesture={gestures.NAMES[gesture]}")
+            if gesture == gestures.ROUGH:
+                sounds = ("angry_sound",) if mood.happy_level < 75 else ("curious_scared_sound",)
             else:
-                curious_scared_sound()
-                print("😮 Whoa, are you taking me somewhere? (ﾟοﾟ)")
-            
-            # Safe happiness adjustment
+                sounds = GESTURE_SOUNDS.get(gesture, ())
+            if mood.on_gesture(gesture, ticks_ms()):
+                for name in sounds:
+                    sound_q.put_nowait(name)
+                redraw.set()
+        except Exception as e:
+            print("Error in mood task:", e)
+
+async def render_task():
+    while True:
+        try:
+            now = ticks_ms()
+            # Regular mood display, or the current reaction
+            deadline = safe_oled_update(mood.face(now), mood.happy_level)
+            # Sleep until the face changes (blink, animation, reaction over) or the mood does
+            wait = RENDER_MAX_MS
+            if deadline is not None:
+                wait = min(wait, ticks_diff(deadline, now))
+            if mood.reaction is not None:
+                wait = min(wait, ticks_diff(mood.reaction_until, now))
+            redraw.clear()
             try:
-                happy_level = get_happy("reduce", happy_level)
-            except TypeError:
-                # Fallback for function signature issues
-                happy_level = max(0, happy_level - 10)
+                await asyncio.wait_for_ms(redraw.wait(), max(1, wait))
+            except asyncio.TimeoutError:
+                pass
+        except Exception as e:
+            print("Error in render task:", e)
+            await asyncio.sleep_ms(1000)
+
+async def sound_task():
+    while True:
+        name = await sound_q.get()
+        try:
+            await play_async(name)
+        except Exception as e:
+            print("Error in sound task:", e)
+        if not sound_q.empty():
+            await asyncio.sleep_ms(SOUND_GAP_MS)
 
-        # Regular mood display
-        safe_oled_update("happy", happy_level)
+async def button_task():
+    # Debug menu access
+    while debug_button.value() != 0:
+        await asyncio.sleep_ms(BUTTON_POLL_MS)
 
-        # Debug menu access
-        if debug_button.value() == 0:
-            open_menu(oled, SET_DEBUG, UPSIDE_DOWN, True, env)
-            startup_sequence()
-            safe_oled_update("happy", 85)
+async def pet():
+    """Run the pet until the menu button is pressed"""
+    global gesture_q, sound_q, redraw
+    gesture_q = Queue(8)
+    sound_q = Queue(4)
+    redraw = asyncio.Event()
+    tasks = [asyncio.create_task(t()) for t in (sensor_task, mood_task, render_task, sound_task)]
+    await button_task()
+    for task in tasks:
+        task.cancel()
+    await asyncio.sleep_ms(0)  # Let the cancellations land (silences the buzzer)
 
-        sleep_ms(50)  # Faster loop for better shake detection (was 150ms)
+def run_menu():
+    env = {
+        'oled': oled,
+        'mpu': mpu,
+        'sensors': sensors,
+        'i2c': i2c_bus, # Add i2c bus to env
+        'open_menu': lambda : open_menu(oled, SET_DEBUG, UPSIDE_DOWN, True, env=env),
+    }
+    sensors.set_profile(ADXL345.PROFILE_ACTIVE)  # Apps get full rate samples
+    open_menu(oled, SET_DEBUG, UPSIDE_DOWN, True, env)
+    oled_functions.invalidate_frame()  # The menu drew over the face
+    # Apps may have re-initialised the sensor, which bypasses the FIFO
+    mpu.enable_fifo()
+    # and the data rate; start over at full rate until inactivity is seen again
+    sensors.set_profile(ADXL345.PROFILE_ACTIVE, force=True)
+    engine.reset()
+    sensor_trace.record(sensor_trace.MARK_RESET, ())
+    startup_sequence()
+    safe_oled_update("happy", 85)
 
+# === MAIN LOOP ===
+# The menu (and the apps and web server it starts) run their own loops, so
+# the scheduler is stopped while it is open and started fresh afterwards.
+while True:
+    try:
+        asyncio.run(pet())
+        sensor_idle = False
+        run_menu()
+        asyncio.new_event_loop()
     except Exception as e:
         print("Error in main loop:", e)
-        sleep_ms(1000)
\ No newline at end of file
+        sleep_ms(1000)
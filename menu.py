@@ -2,25 +2,16 @@ from machine import Pin
 from time import sleep_ms, ticks_ms, ticks_diff
 from pin_values import code_debug_pin_value, buzzer_pin_value, led_pin_value, code_ok_pin_value
 import settings_store
-import framebuf
-import ujson as json
 import os, sys
-import oled_functions
+import core_assets
+import text_engine
+import sensor_trace
 
 PRESERVE_CUSTOM_CODE = {'custom_code_Dice.py', 'custom_code_ButtonClick.py', 'custom_code_Pomodoro.py', 'custom_code_Stopwatch.py', 'custom_code_WinBLE-RickRoll.py', 'custom_code_DeviceTemp.py', 'custom_code_WifiScan.py', 'custom_code_BLEStageControl.py', 'custom_code_RhythmGame.py', 'custom_code_FlappyGame.py', 'custom_code_DinoGame.py', 'custom_code_SnakeGame.py', 'custom_code_Breakout.py'}  # Files never deleted by wipe
 
 def get_preserved_files():
     return PRESERVE_CUSTOM_CODE
 
-# Helper to detect custom core availability
-def _custom_core_available():
-    try:
-        with open('custom_core.json','r') as f:
-            data = json.load(f)
-        return isinstance(data, dict) and ('faces' in data or 'sounds' in data)
-    except Exception:
-        return False
-
 # Scan for custom code scripts (pattern custom_code_*.py)
 def _list_custom_code():
     files = []
@@ -141,21 +132,7 @@ def _run_script(filename, env):
 
 # Helper to render text respecting upside_down
 def _text(oled, s, x, y, upside_down=False):
-    if not upside_down:
-        oled.text(s, x, y)
-        return
-    w = len(s) * 8
-    h = 8
-    buf = bytearray(w * h // 8)
-    fb = framebuf.FrameBuffer(buf, w, h, framebuf.MONO_VLSB)
-    fb.text(s, 0, 0, 1)
-    for i in range(w):
-        for j in range(h):
-            if fb.pixel(i, j):
-                fx = 128 - (x + (i + 1))
-                fy = 64 - (y + (j + 1))
-                if 0 <= fx < 128 and 0 <= fy < 64:
-                    oled.pixel(fx, fy, 1)
+    text_engine.draw(oled, s, x, y, upside_down)
 
 def _reinit_buttons():
     """(Re)initialize button pins. Safe if hardware absent."""
@@ -270,10 +247,33 @@ def _display_ids(oled, upside_down, ok_button):
         while ok_button.value() == 0: sleep_ms(20) # Wait for release
 
 
+def _calibrate_sensor(oled, upside_down, env):
+    mpu = env.get('mpu') if env else None
+    if mpu is None:
+        return
+    import calibration
+    if oled:
+        oled.fill(0)
+        _text(oled, "Lay me flat", 0, 12, upside_down)
+        _text(oled, "and keep still...", 0, 24, upside_down)
+        oled.show()
+    sleep_ms(1000)  # Let go of the buttons
+    offsets = calibration.calibrate(mpu)
+    if offsets is None:
+        result = "Not flat/still"
+    else:
+        result = "Calibrated!"
+    print(f"Calibration: {result} {offsets}")
+    if oled:
+        oled.fill(0)
+        _text(oled, result, 0, 24, upside_down)
+        oled.show()
+    sleep_ms(1200)
+
 def open_menu(oled=None, debug_mode=False, upside_down=False, called_from_main=True, env=None):
     _reinit_buttons()  # ensure fresh button objects each time menu opens
     print("Now in menu mode")
-    has_custom = _custom_core_available()
+    has_custom = core_assets.custom_available()
     if not has_custom and settings_store.get_core_type() != 'Default':
         pass
     core_label = settings_store.get_core_type() if has_custom else 'Default'
@@ -284,6 +284,8 @@ def open_menu(oled=None, debug_mode=False, upside_down=False, called_from_main=T
         {"name": "Run Custom Apps", "key": "exec", "type": "action"},
         {"name": "Wipe Extra Apps", "key": "wipe_custom", "type": "action"},
         {"name": "Start Web Server", "key": "start_web_server", "type": "action"},
+        {"name": "Calibrate Sensor", "key": "calibrate", "type": "action"},
+        {"name": "Record Trace", "key": "trace", "type": "action"},
         {"name": "Reset Settings", "key": "reset", "type": "action"},
     ]
     if called_from_main:
@@ -300,6 +302,8 @@ def open_menu(oled=None, debug_mode=False, upside_down=False, called_from_main=T
         for it in menu_items:
             if it.get('key') == 'core':
                 it['name'] = f"Core: {display_core}"
+            elif it.get('key') == 'trace':
+                it['name'] = "Stop Trace" if sensor_trace.is_recording() else "Record Trace"
         _render_menu(oled, menu_items, selected, debug_mode, upside_down)
         # DOWN / UP navigation: short press = down, long press (>=450ms) = up
         if code_debug_pin.value() == 0:
@@ -323,7 +327,7 @@ def open_menu(oled=None, debug_mode=False, upside_down=False, called_from_main=T
                 elif item['key'] == 'core':
                     if has_custom:
                         settings_store.toggle_core_type()
-                        oled_functions.reload_core()
+                        core_assets.invalidate()
                 elif item['key'] == 'sidekick_id':
                     _display_ids(oled, upside_down, env.get('ok_button'))
                 elif item['key'] == 'exec':
@@ -332,9 +336,13 @@ def open_menu(oled=None, debug_mode=False, upside_down=False, called_from_main=T
                         return 'exit'
                 elif item['key'] == 'wipe_custom':
                     _wipe_custom_code()
+                elif item['key'] == 'calibrate':
+                    _calibrate_sensor(oled, upside_down, env)
+                elif item['key'] == 'trace':
+                    sensor_trace.toggle()
                 elif item['key'] == 'start_web_server':
                     import web_server
-                    web_server.start_web_server(oled, upside_down)
+                    web_server.start_web_server(oled, upside_down, env.get('sensors') if env else None)
                 elif item['key'] == 'reset':
                     settings_store.reset_settings()
                     import machine
@@ -427,6 +435,7 @@ def _execute_code_menu(oled, debug_mode, upside_down, env):
                     env_full.update({
                         'oled': env.get('oled') if env else oled,
                         'mpu': env.get('mpu') if env else None,
+                        'sensors': env.get('sensors') if env else None, # Shared accelerometer (sensor_service.py)
                         'i2c': env.get('i2c') if env else None, # Pass i2c bus
                         'menu_button': code_debug_pin,
                         'ok_button': code_ok_pin,
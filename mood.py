@@ -0,0 +1,84 @@
+# Emotional state driven by gesture events
+# main.py plays the sounds; this keeps the happiness level, the trust counters
+# and the reaction face, so the same decisions can be replayed on a PC
+# against a recorded trace (bench/replay_trace.py).
+
+from time import ticks_add, ticks_diff
+from happy_meter import meter as get_happy
+import gestures
+
+SHAKE_THRESHOLD = 7             # Shakes before all trust is lost
+REACTION_MS = 1500              # How long a reaction face stays up
+# Repeats ignored after a reaction, about as long as its sounds play (the old
+# loop blocked on them): shook_sound twice with a gap, angry/curious_scared
+SHAKE_REFRACTORY_MS = 800
+ROUGH_REFRACTORY_MS = 400
+
+class Mood:
+    def __init__(self, happy_level=50):
+        self.happy_level = happy_level
+        self.shake_count = 0
+        self.headpat_count = 0
+        self.reaction = None    # Face shown instead of the regular mood until reaction_until
+        self.reaction_until = 0
+        self.shake_until = None # SHAKE/ROUGH events before these times are ignored
+        self.rough_until = None
+
+    def _react(self, face, now):
+        self.reaction = face
+        self.reaction_until = ticks_add(now, REACTION_MS)
+
+    def on_gesture(self, gesture, now):
+        """Update the mood for a gesture event at ticks_ms() time now
+
+        Returns False if the event was ignored (a repeat within the
+        refractory period of the last shake or rough reaction).
+        """
+        if gesture == gestures.SHAKE:
+            if self.shake_until is not None and ticks_diff(self.shake_until, now) > 0:
+                return False
+            self.shake_until = ticks_add(now, SHAKE_REFRACTORY_MS)
+            print("😵 I'm getting dizzy! (⸝⸝๑﹏๑⸝⸝)")
+            self._react("shake", now)
+            self.shake_count += 1
+            if self.shake_count >= SHAKE_THRESHOLD:
+                self.happy_level = 0
+                self.shake_count = 0
+                print("💔 All trust lost! I'm extremely dizzy and sad...")
+        elif gesture == gestures.ROUGH:
+            if self.rough_until is not None and ticks_diff(self.rough_until, now) > 0:
+                return False
+            self.rough_until = ticks_add(now, ROUGH_REFRACTORY_MS)
+            if self.happy_level < 75:
+                print("😠 Hey! What was that for! ヽ(｀Д´)ﾉ")
+            else:
+                print("😮 Whoa, are you taking me somewhere? (ﾟοﾟ)")
+            # Safe happiness adjustment
+            try:
+                self.happy_level = get_happy("reduce", self.happy_level)
+            except TypeError:
+                # Fallback for function signature issues
+                self.happy_level = max(0, self.happy_level - 10)
+        elif gesture == gestures.PICKUP:
+            print("😮 Up we go! Where are we going? (ﾟοﾟ)")
+            self._react("surprised", now)
+        elif gesture == gestures.STROLL:
+            print("😊 This is a nice stroll! (´▽｀)")
+            self.happy_level = get_happy("add", self.happy_level, 0.1) # Gradual increase
+        elif gesture == gestures.HEADPAT:
+            print("🥰 Headpats! (˘ω˘)")
+            self.headpat_count += 1
+            self._react("headpat", now)
+            self.happy_level = get_happy("add", self.happy_level)
+        elif gesture == gestures.FALL:
+            print("😱 I'm falling! (ﾟДﾟ;)")
+            self._react("surprised", now)
+        return True
+
+    def face(self, now):
+        """Mood to draw: the current reaction, or the regular happy face"""
+        if self.reaction is not None:
+            if ticks_diff(self.reaction_until, now) > 0:
+                return self.reaction
+            self.reaction = None
+        return "happy"
@@ -1,8 +1,10 @@
-from time import ticks_ms, ticks_diff
-import ujson as json
+from time import ticks_ms, ticks_diff, ticks_add
 import random
 import framebuf
 import settings_store
+import core_assets
+import text_engine
+import animation
 
 # Default face sets (fallback if core json missing)
 DEFAULT_FACES = {
@@ -21,78 +23,43 @@ DEFAULT_FACES = {
     "shake": ['(@_@)', '(@_@)', '(x_x)', '(x_x)', '(x_x)', '(O_o)'],
 }
 
-_core = {}
 FACES = {}
 DEFAULT_UPSIDE = False
 
-def _load_core():
-    core_type = settings_store.get_core_type()
-    
-    files_to_try = []
-    if core_type == 'Custom':
-        files_to_try.append('custom_core.json')
-    files_to_try.append('default_core.json')
-
-    data = None
-    for fname in files_to_try:
-        try:
-            with open(fname, 'r') as f:
-                data = json.load(f)
-                break # Stop after finding a file
-        except Exception:
-            continue
-    
-    if not isinstance(data, dict):
-        data = {}
-
-    faces = data.get('faces', {})
-    merged_faces = dict(DEFAULT_FACES)
-    merged_faces.update(faces)
-    data['faces'] = merged_faces
-    
-    return data
-
 def reload_core():
-    global _core, FACES, DEFAULT_UPSIDE
-    _core = _load_core()
-    FACES = _core.get('faces', dict(DEFAULT_FACES))
-    DEFAULT_UPSIDE = _core.get('display', {}).get('upside_down', False)
-
-# Initial load
-reload_core()
+    """Rebuild faces, timeline and face cache from core_assets (called on invalidate)"""
+    global FACES, DEFAULT_UPSIDE, _timeline
+    FACES = dict(DEFAULT_FACES)
+    FACES.update(core_assets.faces())
+    DEFAULT_UPSIDE = core_assets.display().get('upside_down', False)
+    _timeline = animation.Timeline(FACES, core_assets.animations())
+    _build_face_cache()
 
 # Small text helper that respects upside_down
 def _text(oled, text, x, y, upside_down=False, color=1):
-    if not text:
-        return
-    if not upside_down:
-        oled.text(text, x, y, color)
-        return
-    w = len(text) * 8
-    h = 8
-    buf = bytearray(w * h // 8)
-    fb = framebuf.FrameBuffer(buf, w, h, framebuf.MONO_VLSB)
-    fb.text(text, 0, 0, 1)
-    for i in range(w):
-        for j in range(h):
-            if fb.pixel(i, j):
-                fx = 128 - (x + (i + 1))
-                fy = 64 - (y + (j + 1))
-                if 0 <= fx < 128 and 0 <= fy < 64:
-                    oled.pixel(fx, fy, color)
+    text_engine.draw(oled, text, x, y, upside_down, color)
 
 # --- Animation state ---
 _last_blink_time = 0
 _blinking = False
 _next_blink_interval = None
-_shake_start = None
-_headpat_start = None
+_timeline = None         # animation.Timeline for the loaded core
+_last_request = None     # (mood, upside_down, debug_mode) of the last drawn frame
+_next_deadline = 0       # ticks_ms at which the face next changes
+
+# --- Frame skipping ---
+# update_oled() remembers what it drew last; an identical frame is not redrawn or sent
+_last_frame_key = None
+skipped_frames = 0
+
+def invalidate_frame():
+    """Force the next update_oled() to redraw, e.g. after a menu drew over the face"""
+    global _last_frame_key, _last_request
+    _last_frame_key = None
+    _last_request = None
 
 # --- Timing constants (ms) ---
 BLINK_DURATION = 140
-SHAKE_DURATION = 2000
-HEADPAT_DURATION = 1200
-SWAY_PERIOD = 1800
 
 def _get_blink_interval():
     return random.randint(3000, 6000)
@@ -105,23 +72,70 @@ def _translate_emoji_blink(face):
             .replace('x', '-')
             .replace('_', '-'))
 
-def _draw_ascii(oled, text, x, y, scale=2, upside_down=False):
-    """Draw scaled ASCII text on oled"""
+# --- Face bitmap cache ---
+# Faces are pre-rendered at their drawn scale, so drawing one is a single blit
+# instead of one fill_rect per lit pixel. Keyed by (text, scale, upside_down).
+_face_cache = {}
+_face_orientations = (False, True)  # upside_down values to pre-render
+
+def _render_ascii(text, scale=2, upside_down=False):
+    """Render scaled ASCII text into its own FrameBuffer, returns (fb, w, h)"""
     char_width = 8 * len(text)
     char_height = 8
     temp_buf = bytearray(char_width * char_height // 8)
     temp_fb = framebuf.FrameBuffer(temp_buf, char_width, char_height, framebuf.MONO_VLSB)
     temp_fb.text(text, 0, 0, 1)
+    w = char_width * scale
+    h = char_height * scale
+    fb = framebuf.FrameBuffer(bytearray(w * ((h + 7) // 8)), w, h, framebuf.MONO_VLSB)
     for i in range(char_width):
         for j in range(char_height):
             if temp_fb.pixel(i, j):
                 if upside_down:
-                    # Flip both x and y coordinates for 180 degree rotation
-                    flip_x = 128 - (x + (i + 1) * scale)
-                    flip_y = 64 - (y + (j + 1) * scale)
-                    oled.fill_rect(flip_x, flip_y, scale, scale, 1)
+                    # Rotate 180 degrees inside the bitmap
+                    fb.fill_rect(w - (i + 1) * scale, h - (j + 1) * scale, scale, scale, 1)
                 else:
-                    oled.fill_rect(x + i*scale, y + j*scale, scale, scale, 1)
+                    fb.fill_rect(i * scale, j * scale, scale, scale, 1)
+    return fb, w, h
+
+def _build_face_cache(scale=2):
+    """Pre-render every face (normal, blinking, both orientations) of the loaded core"""
+    _face_cache.clear()
+    for seq in FACES.values():
+        for face in seq:
+            if not face:
+                continue
+            for text in (face, _translate_emoji_blink(face)):
+                for upside_down in _face_orientations:
+                    key = (text, scale, upside_down)
+                    if key not in _face_cache:
+                        _face_cache[key] = _render_ascii(text, scale, upside_down)
+
+def set_face_orientations(orientations):
+    """Limit pre-rendering, e.g. to (False,) once the display flips in hardware"""
+    global _face_orientations
+    _face_orientations = tuple(orientations)
+    _build_face_cache()
+
+def _draw_ascii(oled, text, x, y, scale=2, upside_down=False):
+    """Draw scaled ASCII text on oled"""
+    if not text:
+        return
+    # Only the core's faces are cached; other text (e.g. a live reading in an
+    # app) is rendered each time so the cache can't grow without bound
+    entry = _face_cache.get((text, scale, upside_down))
+    if entry is None:
+        entry = _render_ascii(text, scale, upside_down)
+    fb, w, h = entry
+    if upside_down:
+        # Flip both x and y coordinates for 180 degree rotation
+        oled.blit(fb, 128 - x - w, 64 - y - h, 0)
+    else:
+        oled.blit(fb, x, y, 0)
+
+# Initial load
+reload_core()
+core_assets.subscribe(reload_core)
 
 def _centered_x(face, scale=2):
     w = len(face) * 8 * scale
@@ -130,51 +144,6 @@ def _centered_x(face, scale=2):
 def _seq(name):
     return FACES.get(name) or DEFAULT_FACES.get(name) or ['(._.)']
 
-def get_face_and_x(mood, now, anim_state):
-    if mood == "happy":
-        seq = _seq('happy')
-        idx = (now // 2000) % len(seq)
-        face = seq[idx]
-    elif mood == "really_happy":
-        seq = _seq('really_happy')
-        idx = (now // 1700) % len(seq)
-        face = seq[idx]
-    elif mood == "shake":
-        seq = _seq('shake')
-        phase_len = 210
-        frame = ((ticks_diff(now, anim_state.get("start", now)) // phase_len) % min(3, len(seq)))
-        face = seq[frame]
-        offset_seq = [-11, 0, 10]
-        x = _centered_x(face) + offset_seq[frame % len(offset_seq)]
-        return face, x
-    elif mood == "headpat":
-        seq = _seq('headpat')
-        elapsed = ticks_diff(now, anim_state.get("start", now))
-        if len(seq) < 2:
-            face = seq[0]
-            x = _centered_x(face)
-            return face, x
-        phase = (elapsed // 400) % 2
-        face = seq[phase]
-        x = _centered_x(face) + (2 if phase else -3)
-        return face, x
-    else:
-        seq = _seq(mood if mood in FACES else 'curious')
-        period = SWAY_PERIOD
-        try:
-            from math import sin, pi
-            t = (now % period) / period
-            swing = int(7 * sin(2 * pi * t))
-        except Exception:
-            swing = 0
-        idx = (now // 2600) % len(seq)
-        face = seq[idx]
-        x = _centered_x(face) + swing
-        return face, x
-
-    x = _centered_x(face)
-    return face, x
-
 def update_oled(oled, mood="happy", value=None, upside_down=False, debug_mode=False, **kwargs):
     if mood == "text":
         line = kwargs.get("line")
@@ -190,32 +159,27 @@ def update_oled(oled, mood="happy", value=None, upside_down=False, debug_mode=Fa
         text_to_display = str(value) if value is not None else ""
         color = kwargs.get("color", 1)
         _text(oled, text_to_display, x, y, upside_down, color)
+        invalidate_frame()
         return
 
-    global _last_blink_time, _blinking, _next_blink_interval, _shake_start, _headpat_start
+    global _last_blink_time, _blinking, _next_blink_interval
+    global _last_frame_key, _last_request, _next_deadline, skipped_frames
     now = ticks_ms()
-    anim_state = {}
+    if mood not in FACES:
+        mood = 'curious'
 
-    if mood == "shake":
-        if _shake_start is None:
-            _shake_start = now
-        anim_state["start"] = _shake_start
-        if ticks_diff(now, _shake_start) > SHAKE_DURATION:
-            _shake_start = None
-            mood = "happy"
-    else:
-        _shake_start = None
-    if mood == "headpat":
-        if _headpat_start is None:
-            _headpat_start = now
-        anim_state["start"] = _headpat_start
-        if ticks_diff(now, _headpat_start) > HEADPAT_DURATION:
-            _headpat_start = None
-            mood = "happy"
-    else:
-        _headpat_start = None
+    # Nothing can change before the deadline of the last frame
+    request = (mood, upside_down, debug_mode)
+    if request == _last_request and ticks_diff(now, _next_deadline) < 0:
+        skipped_frames += 1
+        return _next_deadline
+    _last_request = request
+
+    _timeline.sample(mood, now)
+    mood = _timeline.mood
+    deadline = _timeline.deadline
 
-    blinkable = mood not in ("shake", "headpat")
+    blinkable = _timeline.blink
     if _next_blink_interval is None:
         _next_blink_interval = _get_blink_interval()
     if blinkable:
@@ -225,12 +189,25 @@ def update_oled(oled, mood="happy", value=None, upside_down=False, debug_mode=Fa
             _next_blink_interval = _get_blink_interval()
         if _blinking and ticks_diff(now, _last_blink_time) > BLINK_DURATION:
             _blinking = False
+        blink_change = ticks_add(_last_blink_time, (BLINK_DURATION if _blinking else _next_blink_interval) + 1)
+        if ticks_diff(blink_change, deadline) < 0:
+            deadline = blink_change
+    _next_deadline = deadline
 
-    face, x = get_face_and_x(mood, now, anim_state)
+    face = _seq(mood)[_timeline.frame]
+    x = _centered_x(face) + _timeline.offset
 
-    if blinkable and _blinking:
+    blink = blinkable and _blinking
+    if blink:
         face = _translate_emoji_blink(face)
 
+    muted = settings_store.is_muted()
+    frame_key = (face, x, blink, upside_down, debug_mode, muted)
+    if frame_key == _last_frame_key:
+        skipped_frames += 1
+        return _next_deadline
+    _last_frame_key = frame_key
+
     oled.fill(0)
     _draw_ascii(oled, face, x, 20, 2, upside_down)
 
@@ -238,7 +215,7 @@ def update_oled(oled, mood="happy", value=None, upside_down=False, debug_mode=Fa
     parts = []
     if debug_mode:
         parts.append("DBG")
-    if settings_store.is_muted():
+    if muted:
         parts.append("M")  # Single letter muted indicator
     if parts:
         status = " ".join(parts)
@@ -250,6 +227,7 @@ def update_oled(oled, mood="happy", value=None, upside_down=False, debug_mode=Fa
             _text(oled, status, 128 - len(status)*8, 0, False)
 
     oled.show()
+    return _next_deadline
 
 def demo_emotions(oled):
     from time import sleep_ms
@@ -0,0 +1,77 @@
+# Rolling window statistics in O(1) per sample
+# Keeps the running sum, min, max and a count of "active" samples over the
+# last N integer values. Min and max come from monotonic queues, so nothing
+# is rescanned when the window slides and the window size doesn't change the
+# per-sample cost. All storage is allocated up front.
+
+from array import array
+
+class RollingWindow:
+    def __init__(self, size, fill=None):
+        """Window over the last size values; fill pre-loads it like deque([fill] * size)"""
+        self.size = size
+        self._values = array('i', (0 for _ in range(size)))
+        self._active = bytearray(size)
+        self._pos = 0          # Slot the next value goes into
+        self.count = 0
+        self.total = 0         # Sum of the values in the window
+        self.active = 0        # Values pushed with active=True still in the window
+        # Monotonic queues of slots: values decreasing (max) / increasing (min)
+        self._maxq = array('H', (0 for _ in range(size)))
+        self._minq = array('H', (0 for _ in range(size)))
+        self._max_head = self._max_len = 0
+        self._min_head = self._min_len = 0
+        if fill is not None:
+            for _ in range(size):
+                self.push(fill)
+
+    def push(self, value, active=False):
+        """Add value, dropping the oldest once full. active is fixed at insertion"""
+        size = self.size
+        slot = self._pos
+        values = self._values
+        if self.count == size:
+            # The slot being reused holds the oldest value
+            self.total -= values[slot]
+            self.active -= self._active[slot]
+            if self._max_len and self._maxq[self._max_head] == slot:
+                self._max_head = (self._max_head + 1) % size
+                self._max_len -= 1
+            if self._min_len and self._minq[self._min_head] == slot:
+                self._min_head = (self._min_head + 1) % size
+                self._min_len -= 1
+        else:
+            self.count += 1
+
+        # Drop queued values the new one dominates, then queue it
+        q = self._maxq
+        n = self._max_len
+        while n and values[q[(self._max_head + n - 1) % size]] <= value:
+            n -= 1
+        q[(self._max_head + n) % size] = slot
+        self._max_len = n + 1
+        q = self._minq
+        n = self._min_len
+        while n and values[q[(self._min_head + n - 1) % size]] >= value:
+            n -= 1
+        q[(self._min_head + n) % size] = slot
+        self._min_len = n + 1
+
+        values[slot] = value
+        flag = 1 if active else 0
+        self._active[slot] = flag
+        self.active += flag
+        self.total += value
+        self._pos = (slot + 1) % size
+
+    def max(self):
+        return self._values[self._maxq[self._max_head]] if self.count else 0
+
+    def min(self):
+        return self._values[self._minq[self._min_head]] if self.count else 0
+
+    def range(self):
+        return self.max() - self.min()
+
+    def __len__(self):
+        return self.count
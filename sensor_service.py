@@ -0,0 +1,136 @@
+# Shared accelerometer service
+# One ADXL345 driver for the whole firmware. poll() drains the sensor's
+# FIFO into a ring buffer of x, y, z samples (signed raw units) and is the
+# only thing that touches the I2C bus: whoever runs the loop calls it once
+# per pass (main.py's sensor task, or an app once per frame). Every reader
+# gets its own subscription with a read position and a decimation step and
+# reads only the ring, so any number of them cost no extra bus traffic.
+#
+#   sensors = env['sensors']
+#   motion = sensors.subscribe(rate_hz=50)
+#   sensors.poll()                     # once per loop pass
+#   x, y, z = motion.latest()          # newest sample
+#   block = motion.read()              # everything new since the last read
+
+from array import array
+
+RING_SIZE = 128                 # Samples kept (320 ms at 400 Hz)
+
+class Subscription:
+    def __init__(self, service, step):
+        self.service = service
+        self.step = step        # Deliver every step-th sample
+        self.dropped = 0        # Samples that left the ring before being read
+        self._seq = service.seq
+        self._buf = array('h', bytes(6 * (service.size // step + 1)))
+        self._mv = memoryview(self._buf)
+
+    def read(self):
+        """Samples polled since the last read, as x, y, z triples, oldest first
+
+        The result is a view of a buffer reused by the next read.
+        """
+        service = self.service
+        seq = self._seq
+        end = service.seq
+        oldest = end - service.size
+        if seq < oldest:
+            # Fell behind: skip ahead, staying on the decimation grid
+            skipped = oldest - seq
+            skipped += (-skipped) % self.step
+            self.dropped += skipped
+            seq += skipped
+        ring = service._ring
+        size = service.size
+        out = self._buf
+        n = 0
+        if self.step == 1:
+            # Contiguous: at most two slice copies
+            count = end - seq
+            start = (seq % size) * 3
+            first = min(count, size - seq % size) * 3
+            self._mv[0:first] = service._mv[start:start + first]
+            if count * 3 > first:
+                self._mv[first:count * 3] = service._mv[0:count * 3 - first]
+            n = count * 3
+            seq = end
+        else:
+            while seq < end:
+                i = (seq % size) * 3
+                out[n] = ring[i]
+                out[n + 1] = ring[i + 1]
+                out[n + 2] = ring[i + 2]
+                n += 3
+                seq += self.step
+        self._seq = seq
+        return self._mv[:n]
+
+    def latest(self):
+        """Newest polled sample as (x, y, z); marks everything before it as read"""
+        service = self.service
+        self._seq = service.seq
+        return service.latest()
+
+class SensorService:
+    def __init__(self, adxl, rate_hz=None, size=RING_SIZE):
+        self.adxl = adxl
+        self.size = size
+        self.seq = 0            # Samples written since start (the next sample's number)
+        self._ring = array('h', bytes(6 * size))
+        self._mv = memoryview(self._ring)
+        if rate_hz is not None and rate_hz != adxl.rate_hz:
+            adxl.set_data_rate(rate_hz)
+        # The FIFO holds 32 samples between polls: 80 ms at the active profile's 400 Hz,
+        # so the pet loop's 50 ms poll (plus its processing time) loses none
+        adxl.enable_fifo()
+
+    def set_profile(self, name, force=False):
+        """Switch the sensor's power profile (ADXL345.PROFILES)
+
+        Samples still queued at the old rate are dropped, so a block never
+        mixes rates; decimation steps keep counting samples, not time.
+        force rewrites the profile even if it looks current, e.g. after an
+        app re-initialised the sensor.
+        """
+        adxl = self.adxl
+        if adxl.profile == name and not force:
+            return
+        try:
+            adxl.set_profile(name)
+            adxl.read_fifo()
+        except OSError:
+            pass
+
+    def subscribe(self, rate_hz=None, decimation=1):
+        """New reader starting at the next sample; rate_hz overrides decimation"""
+        if rate_hz:
+            decimation = max(1, self.adxl.rate_hz // rate_hz)
+        return Subscription(self, decimation)
+
+    def poll(self):
+        """Move the samples queued in the sensor into the ring. Returns how many
+
+        Call once per loop pass, before the subscriptions read.
+        """
+        try:
+            data = self.adxl.read_fifo()
+        except OSError:
+            return 0
+        values = len(data)
+        if not values:
+            return 0
+        size = self.size
+        pos = (self.seq % size) * 3
+        first = min(values, size * 3 - pos)
+        mv = self._mv
+        mv[pos:pos + first] = data[0:first]
+        if values > first:
+            mv[0:values - first] = data[first:values]
+        self.seq += values // 3
+        return values // 3
+
+    def latest(self):
+        """Newest sample in the ring as (x, y, z), without polling"""
+        i = ((self.seq - 1) % self.size) * 3
+        ring = self._ring
+        return ring[i], ring[i + 1], ring[i + 2]
@@ -0,0 +1,109 @@
+# Accelerometer trace recording
+# Writes what main.py feeds the gesture engine (the raw ADXL345 samples and
+# interrupt flags of every loop) to a compact binary file, so a session can
+# be downloaded from the web server and replayed on a PC
+# (bench/replay_trace.py).
+#
+# Format, little endian:
+#   header  "SKTR", version (u8), record header size (u8), LSB per g (u16)
+#   record  ms since start (u32), interrupt flags (u8), sample count (u8),
+#           then count x, y, z triples (i16)
+# The flags are the ADXL345 INT_SOURCE bits, plus MARK_RESET (the overrun
+# bit, which is never enabled as an event) when main.py reset the engine.
+
+import struct
+from array import array
+from time import ticks_ms, ticks_diff
+
+TRACE_FILE = "trace.bin"
+MAGIC = b"SKTR"
+VERSION = 1
+HEADER = "<4sBBH"
+RECORD = "<IBB"
+RECORD_SIZE = struct.calcsize(RECORD)
+LSB_PER_G = 256
+MAX_BYTES = 256 * 1024          # Stop before the trace fills the flash (~4 min of samples)
+MARK_RESET = 0x01               # Gesture engine reset outside the interrupts (menu closed)
+FLUSH_EVERY = 20                # Records between flushes (~1 s), so a reset loses little
+
+_file = None
+_start = 0
+_size = 0
+_unflushed = 0
+_rec = bytearray(RECORD_SIZE)
+
+def is_recording():
+    return _file is not None
+
+def start(path=TRACE_FILE):
+    """Start a new trace, replacing the previous one"""
+    global _file, _start, _size, _unflushed
+    stop()
+    _file = open(path, "wb")
+    _file.write(struct.pack(HEADER, MAGIC, VERSION, RECORD_SIZE, LSB_PER_G))
+    _start = ticks_ms()
+    _size = struct.calcsize(HEADER)
+    _unflushed = 0
+    print("🔴 Recording accelerometer trace")
+
+def stop():
+    global _file
+    if _file is None:
+        return
+    try:
+        _file.close()
+    except OSError:
+        pass
+    _file = None
+    print(f"⏹️ Trace stopped ({_size} bytes)")
+
+def toggle():
+    if _file is None:
+        start()
+    else:
+        stop()
+    return _file is not None
+
+def record(events, samples):
+    """Append one loop's interrupt flags and x, y, z triples (signed raw units)"""
+    global _size, _unflushed
+    if _file is None:
+        return
+    count = len(samples) // 3
+    if not events and not count:
+        return
+    length = RECORD_SIZE + count * 6
+    if _size + length > MAX_BYTES:
+        stop()
+        return
+    struct.pack_into(RECORD, _rec, 0, ticks_diff(ticks_ms(), _start), events & 0xFF, count)
+    try:
+        _file.write(_rec)
+        if count:
+            if not isinstance(samples, (array, memoryview)):
+                samples = array('h', samples)
+            _file.write(samples)
+        _size += length
+        _unflushed += 1
+        if _unflushed >= FLUSH_EVERY:
+            _file.flush()
+            _unflushed = 0
+    except OSError:
+        stop()  # Flash full or removed; keep what was written
+
+def records(f):
+    """Yield (ms, events, samples) from an open trace file"""
+    header = f.read(struct.calcsize(HEADER))
+    magic, version, rec_size, _ = struct.unpack(HEADER, header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a trace file")
+    while True:
+        head = f.read(rec_size)
+        if len(head) < rec_size:
+            return
+        ms, events, count = struct.unpack(RECORD, head[:RECORD_SIZE])
+        data = f.read(count * 6)
+        if len(data) < count * 6:
+            return  # Cut short by a reset mid-write
+        samples = array('h', struct.unpack("<%dh" % (count * 3), data))
+        yield ms, events, samples
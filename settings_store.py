@@ -16,6 +16,7 @@ _default_settings = {
     "core_type": "Custom",
     "sidekick_id": None,
     "ap_password": None,
+    "accel_offsets": None,
 }
 
 _settings = {}
@@ -66,6 +67,16 @@ def toggle_core_type():
     return _settings["core_type"]
 
 
+def get_accel_offsets():
+    """Accelerometer offset register values [x, y, z], or None if never calibrated"""
+    return _settings.get("accel_offsets")
+
+
+def set_accel_offsets(offsets):
+    _settings["accel_offsets"] = list(offsets) if offsets is not None else None
+    _save()
+
+
 def get_sidekick_id():
     global _settings
     if "sidekick_id" not in _settings or _settings["sidekick_id"] is None:
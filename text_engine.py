@@ -0,0 +1,71 @@
+# Shared 8x8 text renderer for the OLED
+# Upside-down strings are drawn by blitting tiles from a glyph atlas that is
+# rotated 180 degrees once, instead of walking every pixel of every string.
+
+import framebuf
+
+SCREEN_WIDTH, SCREEN_HEIGHT = 128, 64
+GLYPH_SIZE = 8
+FIRST_CHAR = 32
+LAST_CHAR = 127  # Also used for characters outside the built-in font
+
+_tiles = None       # One 8x8 FrameBuffer per glyph, all backed by a single atlas
+_invert_palette = None
+
+def _reverse_bits(b):
+    r = 0
+    for _ in range(8):
+        r = (r << 1) | (b & 1)
+        b >>= 1
+    return r
+
+def _build_atlas():
+    """Render the built-in font once and rotate every glyph by 180 degrees"""
+    global _tiles, _invert_palette
+    count = LAST_CHAR - FIRST_CHAR + 1
+    atlas = bytearray(count * GLYPH_SIZE)
+    fb = framebuf.FrameBuffer(atlas, count * GLYPH_SIZE, GLYPH_SIZE, framebuf.MONO_VLSB)
+    for c in range(FIRST_CHAR, LAST_CHAR + 1):
+        fb.text(chr(c), (c - FIRST_CHAR) * GLYPH_SIZE, 0, 1)
+    # MONO_VLSB stores one byte per column: rotating a tile means reversing
+    # the column order and the bit (row) order inside each column.
+    for g in range(count):
+        base = g * GLYPH_SIZE
+        cols = [_reverse_bits(atlas[base + k]) for k in range(GLYPH_SIZE)]
+        for k in range(GLYPH_SIZE):
+            atlas[base + k] = cols[GLYPH_SIZE - 1 - k]
+    mv = memoryview(atlas)
+    _tiles = [framebuf.FrameBuffer(mv[g * GLYPH_SIZE:(g + 1) * GLYPH_SIZE], GLYPH_SIZE, GLYPH_SIZE, framebuf.MONO_VLSB)
+              for g in range(count)]
+    # Maps glyph pixels to colour 0 so text can be "erased" onto lit areas
+    _invert_palette = framebuf.FrameBuffer(bytearray(1), 2, 1, framebuf.MONO_HLSB)
+    _invert_palette.pixel(0, 0, 1)
+    _invert_palette.pixel(1, 0, 0)
+
+def draw(oled, s, x, y, upside_down=False, color=1):
+    """Draw s at (x, y) in screen coordinates, rotated 180 degrees if upside_down"""
+    if not s:
+        return
+    if not upside_down:
+        oled.text(s, x, y, color)
+        return
+    if _tiles is None:
+        _build_atlas()
+    # Glyph k of the string lands mirrored from the right/bottom edges
+    tx = SCREEN_WIDTH - GLYPH_SIZE - x
+    ty = SCREEN_HEIGHT - GLYPH_SIZE - y
+    if ty <= -GLYPH_SIZE or ty >= SCREEN_HEIGHT:
+        return
+    for ch in s:
+        if tx <= -GLYPH_SIZE:
+            break  # Rest of the string is off the left edge
+        if tx < SCREEN_WIDTH:
+            c = ord(ch)
+            if c < FIRST_CHAR or c > LAST_CHAR:
+                c = LAST_CHAR
+            tile = _tiles[c - FIRST_CHAR]
+            if color:
+                oled.blit(tile, tx, ty, 0)
+            else:
+                oled.blit(tile, tx, ty, 1, _invert_palette)
+        tx -= GLYPH_SIZE
@@ -19,7 +19,7 @@ mp-helper fulldev
     Upload all configured files then run main.py (single device selection).
 """
 
-import argparse, glob, os, platform, re, subprocess, sys, textwrap
+import argparse, glob, os, platform, re, subprocess, sys, tempfile, textwrap
 from pathlib import Path
 from typing import List, Optional, Tuple
 
@@ -35,8 +35,20 @@ FILE_PATTERNS: List[str] = [
     "happy_meter.py",
     "buzzer_sounds.py",
     "ADXL345.py",
+    "rolling_window.py",
+    "gestures.py",
+    "mood.py",
+    "sensor_trace.py",
+    "calibration.py",
+    "sensor_service.py",
+    "async_queue.py",
     "MPU6050.py",
+    "core_assets.py",
     "oled_functions.py",
+    "display.py",
+    "animation.py",
+    "text_engine.py",
+    "canvas.py",
     "settings_store.py",
     "default_core.json",
     "custom_core.json",
@@ -51,6 +63,10 @@ FILE_PATTERNS: List[str] = [
     "*.bmp",
 ]
 
+# Personality cores are also compiled (core_compiler.py) and uploaded as
+# <name>.bin next to the JSON, which the device then reads instead.
+CORE_FILES: List[str] = ["default_core.json", "custom_core.json"]
+
 # -----------------------------------------------------------------------------
 
 
@@ -235,13 +251,27 @@ def _gather_files() -> List[Path]:
     return files
 
 
+def _upload_compiled_core(port: str, src: Path, build: Path) -> None:
+    from core_compiler import CoreError, compile_file
+    try:
+        dst = compile_file(src, build / src.with_suffix(".bin").name)
+    except (OSError, CoreError) as e:
+        print(f"Not compiling {src} ({e}); the device will parse the JSON.")
+        return
+    print(f"Uploading {dst.name} (compiled {src}) → {port} …")
+    _run_mpremote("connect", port, "fs", "cp", str(dst), ":" + dst.name)
+
+
 def _upload_files(port: str) -> None:
     files = _gather_files()
     if not files:
         sys.exit("No files matched FILE_PATTERNS.")
-    for f in files:
-        print(f"Uploading {f} → {port} …")
-        _run_mpremote("connect", port, "fs", "cp", str(f), ":")
+    with tempfile.TemporaryDirectory() as build:
+        for f in files:
+            print(f"Uploading {f} → {port} …")
+            _run_mpremote("connect", port, "fs", "cp", str(f), ":")
+            if f.name in CORE_FILES:
+                _upload_compiled_core(port, f, Path(build))
     print("Upload complete.")
 
 
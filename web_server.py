@@ -8,6 +8,7 @@ import sys
 import io
 
 import settings_store
+import sensor_trace
 from machine import Pin, reset
 from pin_values import code_debug_pin_value
 from menu import get_preserved_files
@@ -149,6 +150,28 @@ async def handle_request(reader, writer):
             await writer.awrite(b'HTTP/1.1 200 OK\r\n\r\n')
         elif path == '/api/logs' and method == 'GET':
             await writer.awrite(b'HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n\r\n' + _app_runner.get_logs().encode())
+        elif path == '/api/trace' and method == 'GET':
+            # Recorded accelerometer trace, for bench/replay_trace.py
+            sensor_trace.stop()
+            try:
+                f = open(sensor_trace.TRACE_FILE, 'rb')
+            except OSError:
+                await writer.awrite(b'HTTP/1.1 404 Not Found\r\n\r\nNo trace recorded.')
+            else:
+                with f:
+                    await writer.awrite(b'HTTP/1.1 200 OK\r\nContent-Type: application/octet-stream\r\nContent-Disposition: attachment; filename="trace.bin"\r\n\r\n')
+                    while True:
+                        chunk = f.read(512)
+                        if not chunk:
+                            break
+                        await writer.awrite(chunk)
+        elif path == '/api/trace' and method == 'DELETE':
+            sensor_trace.stop()
+            try:
+                os.remove(sensor_trace.TRACE_FILE)
+            except OSError:
+                pass
+            await writer.awrite(b'HTTP/1.1 204 No Content\r\n\r\n')
         elif path == '/api/reset' and method == 'POST':
             settings_store.reset_settings()
             reset()
@@ -160,7 +183,7 @@ async def handle_request(reader, writer):
     finally:
         await writer.aclose()
 
-async def main(oled, upside_down):
+async def main(oled, upside_down, sensors=None):
     global _app_runner, _oled, _upside_down
     _oled = oled
     _upside_down = upside_down
@@ -171,7 +194,8 @@ async def main(oled, upside_down):
         'settings': settings_store,
         'Pin': Pin,
         'i2c': None, 
-        'mpu': None, 
+        'mpu': sensors.adxl if sensors else None,
+        'sensors': sensors,
     }
     _app_runner = AppRunner(env)
 
@@ -211,10 +235,10 @@ def finish():
     time.sleep(2) # Give time to display message
     reset()
 
-def start_web_server(oled, upside_down):
+def start_web_server(oled, upside_down, sensors=None):
     try:
         loop = asyncio.get_event_loop()
-        loop.run_until_complete(main(oled, upside_down))
+        loop.run_until_complete(main(oled, upside_down, sensors))
     except Exception as e:
         print(f"Web server error: {e}")
     finally: